@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+JSON report writing shared by the Next.js scanners.
+
+Uses orjson when it is installed (serialization in native code, one bytes
+write) and falls back to the standard library otherwise; the output is
+indented JSON either way.
+"""
+
+import json
+from typing import Dict
+
+try:
+    import orjson  # Optional: much faster JSON for large reports
+except ImportError:
+    orjson = None
+
+
+def save_json(data: Dict, path: str):
+    """Write indented JSON, using orjson when available"""
+    if orjson:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    # Stream encoder chunks through a 1 MB buffer rather than building the
+    # whole document in memory; the indented encoder yields many tiny chunks
+    encoder = json.JSONEncoder(indent=2)
+    with open(path, 'w', buffering=1 << 20) as f:
+        for chunk in encoder.iterencode(data):
+            f.write(chunk)
@@ -7,86 +7,117 @@ Runs all Next.js scans (performance, security, debug) and generates a combined r
 
 import os
 import sys
-import json
-import subprocess
+import argparse
+import itertools
+import importlib.util
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
-
-def run_scanner(script_name: str, root_dir: str, execution_dir: str) -> Dict:
-    """Run a scanner script and return results"""
-    script_path = Path(__file__).parent / script_name
-
-    print(f"\n{'='*60}")
-    print(f"Running {script_name}...")
-    print(f"{'='*60}")
+from types import ModuleType
+from typing import Dict, List, Optional
+
+from json_output import save_json
+from scan_cache import FindingsCache
+from source_files import iter_source_files
+from worker_pool import create_pool
+
+# Scanner scripts, in report order. Each exposes run(root_dir, files, ...) -> results dict
+SCANNERS = (
+    'scan-performance.py',
+    'scan-security.py',
+    'scan-debug.py',
+    'scan-api-status.py',
+)
+
+# Severity levels in report order
+SEVERITY_LEVELS = ['Critical', 'High', 'Medium', 'Low']
+
+# Scanners that keep a per-file findings cache (run() accepts a FindingsCache)
+CACHED_SCANNERS = {'scan-performance.py', 'scan-debug.py', 'scan-api-status.py'}
+
+# Scanners that fan their files out to the shared worker pool; these run on a
+# thread, the others (pure-Python regex work that holds the GIL) as a pool job
+SELF_PARALLEL_SCANNERS = {'scan-performance.py', 'scan-security.py', 'scan-debug.py'}
+
+
+def load_scanner(script_name: str) -> ModuleType:
+    """Import a scanner script as a module (hyphenated file names can't be imported by name)"""
+    module_name = script_name[:-len('.py')].replace('-', '_')
+    module = sys.modules.get(module_name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(module_name, Path(__file__).parent / script_name)
+        module = importlib.util.module_from_spec(spec)
+        # Register before executing so worker processes can pickle the module's functions
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def run_scanner(script_name: str, root_dir: str, execution_dir: str,
+                use_cache: bool = True, files: Optional[List[str]] = None,
+                pool: Optional[ProcessPoolExecutor] = None) -> Optional[Dict]:
+    """Run a scanner module's run() and return its results"""
+    scanner = load_scanner(script_name)
+    kwargs = {}
+    if script_name in CACHED_SCANNERS:
+        kwargs['cache'] = FindingsCache(script_name.replace('.py', ''), execution_dir,
+                                        scanner.__file__, enabled=use_cache)
+    if pool is not None:
+        kwargs['pool'] = pool
+
+    print(f"Starting {script_name}...", flush=True)
 
     try:
-        result = subprocess.run(
-            [sys.executable, str(script_path), root_dir],
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            cwd=execution_dir  # Ensure subprocess runs in execution directory
-        )
-
-        # Print output
-        print(result.stdout)
-
-        # Load JSON results from execution directory
-        output_file = os.path.join(execution_dir, script_name.replace('.py', '-results.json'))
-        with open(output_file, 'r') as f:
-            return json.load(f)
-
-    except subprocess.TimeoutExpired:
-        print(f"ERROR: {script_name} timed out")
-        return None
-    except FileNotFoundError:
-        print(f"ERROR: {script_name} output file not found")
-        return None
-    except json.JSONDecodeError:
-        print(f"ERROR: {script_name} produced invalid JSON")
-        return None
+        results = scanner.run(root_dir, files, **kwargs)
     except Exception as e:
-        print(f"ERROR: {script_name} failed: {e}")
+        print(f"ERROR: {script_name} failed: {e}", flush=True)
         return None
 
+    print(f"Finished {script_name}: {results['total_issues']} issues "
+          f"in {results['total_files_scanned']} files", flush=True)
+    return results
+
 
 def generate_combined_report(results: Dict[str, Dict]) -> Dict:
     """Generate combined report from all scanner results"""
     total_files = set()
-    all_findings = []
-    severity_totals = {'Critical': 0, 'High': 0, 'Medium': 0, 'Low': 0}
+    # Bucket findings by severity as they arrive (a stable counting sort), so the
+    # combined list comes out ordered without a key-function sort over every dict
+    severity_buckets = {severity: [] for severity in SEVERITY_LEVELS}
+    unranked_findings = []
+    severity_totals = Counter(dict.fromkeys(SEVERITY_LEVELS, 0))
     category_breakdown = {}
 
     for category, data in results.items():
         if data is None:
             continue
 
+        category_name = category.replace('-scan', '')
+
         # Collect files
-        total_files.update(data.get('scanned_files', []))
+        total_files.update(data.get('scanned_files', ()))
 
         # Collect findings with category tag
-        for finding in data.get('findings', []):
-            finding['category'] = category.replace('-scan', '')
-            all_findings.append(finding)
+        for finding in data.get('findings', ()):
+            finding['category'] = category_name
+            severity_buckets.get(finding.get('severity', 'Low'), unranked_findings).append(finding)
 
         # Sum severity counts
-        for severity, count in data.get('severity_breakdown', {}).items():
-            severity_totals[severity] += count
+        severity_totals.update(data.get('severity_breakdown', {}))
 
         # Category breakdown
-        category_breakdown[category.replace('-scan', '')] = data.get('total_issues', 0)
+        category_breakdown[category_name] = data.get('total_issues', 0)
 
-    # Sort findings by severity
-    severity_order = {'Critical': 0, 'High': 1, 'Medium': 2, 'Low': 3}
-    all_findings.sort(key=lambda x: severity_order.get(x.get('severity', 'Low'), 4))
+    # Concatenate buckets: findings sorted by severity, each level a contiguous band
+    all_findings = list(itertools.chain.from_iterable(severity_buckets.values()))
+    all_findings.extend(unranked_findings)
 
     return {
         'scan_date': datetime.now().isoformat(),
         'total_files_scanned': len(total_files),
         'total_issues': len(all_findings),
-        'severity_breakdown': severity_totals,
+        'severity_breakdown': dict(severity_totals),
         'category_breakdown': category_breakdown,
         'findings': all_findings
     }
@@ -111,8 +142,10 @@ def print_summary(report: Dict):
         if count > 0:
             print(f"  {category.title()}: {count}")
 
-    # Show top critical issues
-    critical_findings = [f for f in report['findings'] if f['severity'] == 'Critical']
+    # Show top critical issues (findings are sorted, so Critical is the leading band)
+    critical_findings = list(itertools.takewhile(
+        lambda f: f['severity'] == 'Critical', report['findings']
+    ))
     if critical_findings:
         print(f"\n{'='*60}")
         print(f"CRITICAL ISSUES ({len(critical_findings)})")
@@ -129,73 +162,110 @@ def print_summary(report: Dict):
 
 def generate_markdown_report(report: Dict, output_file: str):
     """Generate markdown report"""
-    with open(output_file, 'w') as f:
-        f.write("# Next.js Comprehensive Scan Report\n\n")
-        f.write(f"**Scan Date:** {report['scan_date']}\n\n")
+    # Large buffer plus one write per section instead of thousands of small writes
+    with open(output_file, 'w', buffering=1024 * 1024, encoding='utf-8') as f:
+        buf = ["# Next.js Comprehensive Scan Report\n\n"]
+        buf.append(f"**Scan Date:** {report['scan_date']}\n\n")
 
         # Executive Summary
-        f.write("## Executive Summary\n\n")
-        f.write(f"- **Files Scanned:** {report['total_files_scanned']}\n")
-        f.write(f"- **Total Issues:** {report['total_issues']}\n\n")
+        buf.append("## Executive Summary\n\n")
+        buf.append(f"- **Files Scanned:** {report['total_files_scanned']}\n")
+        buf.append(f"- **Total Issues:** {report['total_issues']}\n\n")
 
         # Severity Breakdown
-        f.write("### Severity Breakdown\n\n")
+        buf.append("### Severity Breakdown\n\n")
         for severity, count in report['severity_breakdown'].items():
             if count > 0:
-                f.write(f"- **{severity}:** {count}\n")
+                buf.append(f"- **{severity}:** {count}\n")
 
         # Category Breakdown
-        f.write("\n### Category Breakdown\n\n")
+        buf.append("\n### Category Breakdown\n\n")
         for category, count in report['category_breakdown'].items():
             if count > 0:
-                f.write(f"- **{category.title()}:** {count}\n")
+                buf.append(f"- **{category.title()}:** {count}\n")
 
         # Detailed Findings
-        f.write("\n---\n\n## Detailed Findings\n\n")
+        buf.append("\n---\n\n## Detailed Findings\n\n")
+        f.write("".join(buf))
 
-        for severity in ['Critical', 'High', 'Medium', 'Low']:
-            findings = [f for f in report['findings'] if f['severity'] == severity]
+        # Findings are sorted by severity, so each level is one contiguous band
+        for severity, band in itertools.groupby(report['findings'], key=lambda f: f['severity']):
+            findings = list(band)
 
-            if findings:
-                f.write(f"\n### {severity} Issues ({len(findings)})\n\n")
+            if severity in SEVERITY_LEVELS:
+                buf = [f"\n### {severity} Issues ({len(findings)})\n\n"]
 
                 for i, finding in enumerate(findings, 1):
-                    f.write(f"#### {i}. {finding['title']}\n\n")
-                    f.write(f"**Location:** `{finding['file']}:{finding['line']}`\n\n")
-                    f.write(f"**Category:** {finding['category'].title()}\n\n")
-                    f.write(f"**Problem:** {finding['problem']}\n\n")
-                    f.write(f"**Fix:** {finding['fix']}\n\n")
+                    buf.append(f"#### {i}. {finding['title']}\n\n")
+                    buf.append(f"**Location:** `{finding['file']}:{finding['line']}`\n\n")
+                    buf.append(f"**Category:** {finding['category'].title()}\n\n")
+                    buf.append(f"**Problem:** {finding['problem']}\n\n")
+                    buf.append(f"**Fix:** {finding['fix']}\n\n")
 
                     if finding.get('code'):
-                        f.write("**Code:**\n")
-                        f.write(f"```typescript\n{finding['code']}\n```\n\n")
+                        buf.append("**Code:**\n")
+                        buf.append(f"```typescript\n{finding['code']}\n```\n\n")
+
+                    buf.append("---\n\n")
 
-                    f.write("---\n\n")
+                # Flush per severity section to bound memory on very large reports
+                f.write("".join(buf))
+                f.flush()
 
 
 def main():
     """Main execution"""
     # Capture the original working directory where command was executed
     execution_dir = os.getcwd()
-    root_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+
+    parser = argparse.ArgumentParser(description='Run all Next.js scans and generate a combined report')
+    parser.add_argument('root_dir', nargs='?', default='.', help='Directory to scan')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rescan every file instead of reusing cached findings')
+    args = parser.parse_args()
+    root_dir = args.root_dir
 
     print(f"\n{'='*60}")
     print(f"NEXT.JS COMPREHENSIVE SCANNER")
     print(f"{'='*60}")
     print(f"Scanning: {root_dir}")
 
-    # Run all scanners
-    scanners = [
-        'scan-performance.py',
-        'scan-security.py',
-        'scan-debug.py',
-        'scan-api-status.py'
-    ]
+    # Import every scanner up front so forked workers inherit the loaded modules
+    # (no per-scanner interpreter startup, results come back without a JSON file)
+    for script_name in SCANNERS:
+        load_scanner(script_name)
+
+    # Enumerate source files once and share the list with every scanner
+    files = list(iter_source_files(root_dir))
+
+    # One worker pool for every scanner, started here while this process is still
+    # single-threaded (forking once threads are running can deadlock the workers)
+    pool = create_pool()
 
+    # Scanners are independent, so run them concurrently (wall time ~ slowest scanner)
+    thread_scanners = [name for name in SCANNERS if name in SELF_PARALLEL_SCANNERS]
     results = {}
-    for scanner in scanners:
-        result = run_scanner(scanner, root_dir, execution_dir)
-        results[scanner.replace('.py', '')] = result
+    with pool, ThreadPoolExecutor(max_workers=len(thread_scanners)) as threads:
+        futures = {}
+        for script_name in SCANNERS:
+            if script_name in SELF_PARALLEL_SCANNERS:
+                future = threads.submit(run_scanner, script_name, root_dir, execution_dir,
+                                        not args.no_cache, files, pool)
+            else:
+                future = pool.submit(run_scanner, script_name, root_dir, execution_dir,
+                                     not args.no_cache, files)
+            futures[future] = script_name
+
+        for future in as_completed(futures):
+            script_name = futures[future]
+            try:
+                results[script_name] = future.result()
+            except Exception as e:  # e.g. a worker process died
+                print(f"ERROR: {script_name} failed: {e}")
+                results[script_name] = None
+
+    # Keep report ordering stable regardless of completion order
+    results = {script_name.replace('.py', ''): results[script_name] for script_name in SCANNERS}
 
     # Generate combined report
     combined_report = generate_combined_report(results)
@@ -205,8 +275,7 @@ def main():
 
     # Save JSON report in the execution directory
     json_output = os.path.join(execution_dir, 'nextjs-audit-report.json')
-    with open(json_output, 'w') as f:
-        json.dump(combined_report, f, indent=2)
+    save_json(combined_report, json_output)
 
     print(f"\n{'='*60}")
     print(f"JSON report saved to: {json_output}")
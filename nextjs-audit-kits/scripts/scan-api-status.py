@@ -19,8 +19,13 @@ import os
 import re
 import json
 import sys
+import argparse
+from bisect import bisect_left
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from scan_cache import MISS, FindingsCache, file_stamp
+from source_files import SKIP_DIRS, iter_source_files, read_file_list
 
 
 # Patterns for API route files
@@ -77,17 +82,51 @@ CONSOLE_PATTERNS = [
     r"debugger;",
 ]
 
+# Pre-compiled, fused forms of the pattern families above (built once at import)
+API_ROUTE_RE = re.compile("|".join(API_ROUTE_PATTERNS))
+SERVER_ACTION_RE = re.compile("|".join(SERVER_ACTION_PATTERNS))
+ERROR_WORD_RE = re.compile("|".join(ERROR_FIELDS), re.IGNORECASE)
+ERROR_FIELD_RE = re.compile(
+    r"[{,]\s*(?:" + "|".join(ERROR_FIELDS) + r")\s*:", re.IGNORECASE
+)
+# One regex per field, tried in ERROR_FIELDS order once ERROR_FIELD_RE matched,
+# so the reported field follows that priority rather than position in the line
+ERROR_FIELD_RES = [
+    (field, re.compile(rf"[{{,]\s*{field}\s*:", re.IGNORECASE)) for field in ERROR_FIELDS
+]
+FAILURE_FLAGS_RE = re.compile("|".join(FAILURE_FLAGS))
+STATUS_STRINGS_RE = re.compile("|".join(STATUS_STRINGS))
+CONSOLE_RE = re.compile("|".join(CONSOLE_PATTERNS))
+STATUS_200_RE = re.compile(r"status\s*:\s*200")
+ERROR_STATUS_RE = re.compile(r"status\s*:\s*[45]\d{2}")
+RESPONSE_RE = re.compile(r"NextResponse\.json|new Response|\.json\(")
+NEWLINE_RE = re.compile(r"\n")
+
 
 def is_api_route_file(filepath: str) -> bool:
     """Check if file is an API route."""
-    for pattern in API_ROUTE_PATTERNS:
-        if re.search(pattern, filepath):
-            return True
-    return False
+    return API_ROUTE_RE.search(filepath) is not None
+
+
+def iter_match_lines(pattern: re.Pattern, content: str,
+                     newlines: List[int]) -> Iterator[Tuple[int, str, re.Match]]:
+    """Yield (line_num, line, first match) for each line of content that pattern matches."""
+    last_line = 0
+    for match in pattern.finditer(content):
+        line_num = bisect_left(newlines, match.start()) + 1
+        if line_num != last_line:
+            last_line = line_num
+            start = newlines[line_num - 2] + 1 if line_num > 1 else 0
+            end = newlines[line_num - 1] if line_num <= len(newlines) else len(content)
+            yield line_num, content[start:end], match
 
 
-def scan_file(filepath: str) -> Dict[str, Any]:
-    """Scan a single file for status code issues."""
+def scan_content(filepath: str, content: str) -> Dict[str, Any]:
+    """Scan already-loaded file content for status code issues.
+
+    Each pattern family runs once over the whole content with finditer; line
+    numbers are recovered by bisecting the newline offsets.
+    """
     findings = {
         "file": filepath,
         "incorrect_status_codes": [],
@@ -96,120 +135,143 @@ def scan_file(filepath: str) -> Dict[str, Any]:
         "has_responses": False,
         "has_server_action": False,
     }
+    newlines = [m.start() for m in NEWLINE_RE.finditer(content)]
 
-    try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-    except Exception as e:
-        return findings
-
-    for line_num, line in enumerate(lines, start=1):
-        line_stripped = line.strip()
+    # Cheap substring gates below skip whole regex passes when their anchors are absent
 
-        # Check if it's a Server Action
-        if re.search(r"['\"]use server['\"]", line_stripped):
-            findings["has_server_action"] = True
+    # Check if it's a Server Action
+    if "use server" in content and SERVER_ACTION_RE.search(content):
+        findings["has_server_action"] = True
 
-        # Check for NextResponse.json or Response
-        if "NextResponse.json" in line or "new Response" in line or ".json(" in line:
+    # Check lines with NextResponse.json or Response
+    if "json" in content or "new Response" in content:
+        for line_num, line, _ in iter_match_lines(RESPONSE_RE, content, newlines):
             findings["has_responses"] = True
+            check_response_line(findings, line_num, line)
 
-            # Check for explicit 200 with error fields
-            if re.search(r"status\s*:\s*200", line):
-                for error_field in ERROR_FIELDS:
-                    if error_field in line_stripped.lower():
-                        findings["incorrect_status_codes"].append({
-                            "line": line_num,
-                            "code": line_stripped,
-                            "reason": f"200 status with '{error_field}' field",
-                            "severity": "HIGH"
-                        })
-                        break
-
-            # Check for error fields without status code
-            has_status = re.search(r"status\s*:\s*[45]\d{2}", line)
-            if not has_status:
-                for error_field in ERROR_FIELDS:
-                    # Look for field in JSON-like structure
-                    pattern = rf"[{{,]\s*{error_field}\s*:"
-                    if re.search(pattern, line_stripped, re.IGNORECASE):
-                        findings["missing_status_codes"].append({
-                            "line": line_num,
-                            "code": line_stripped,
-                            "reason": f"Response with '{error_field}' field but no 4xx/5xx status",
-                            "severity": "HIGH"
-                        })
-                        break
-
-                # Check for boolean failure flags
-                for flag_pattern in FAILURE_FLAGS:
-                    if re.search(flag_pattern, line_stripped):
-                        findings["missing_status_codes"].append({
-                            "line": line_num,
-                            "code": line_stripped,
-                            "reason": f"Failure flag without proper HTTP status",
-                            "severity": "HIGH"
-                        })
-                        break
-
-                # Check for status string values
-                for status_str in STATUS_STRINGS:
-                    if re.search(status_str, line_stripped):
-                        findings["missing_status_codes"].append({
-                            "line": line_num,
-                            "code": line_stripped,
-                            "reason": "String status instead of HTTP status code",
-                            "severity": "HIGH"
-                        })
-                        break
-
-        # Check for console logging
-        for console_pattern in CONSOLE_PATTERNS:
-            if re.search(console_pattern, line_stripped):
-                severity = "LOW" if "debugger" in console_pattern else "MEDIUM"
-                findings["console_logging"].append({
-                    "line": line_num,
-                    "code": line_stripped,
-                    "reason": f"Console/debug statement in production code",
-                    "severity": severity
-                })
-                break
+    # Check for console logging
+    if "console." not in content and "debugger" not in content:
+        return findings
+
+    for line_num, line, match in iter_match_lines(CONSOLE_RE, content, newlines):
+        statement = match.group()
+        is_debugger = statement == "debugger;"
+        findings["console_logging"].append({
+            "line": line_num,
+            "code": line.strip(),
+            "reason": f"Console/debug statement in production code",
+            "type": "debugger" if is_debugger else statement[len("console."):-1],
+            "severity": "LOW" if is_debugger else "MEDIUM"
+        })
 
     return findings
 
 
-def scan_directory(directory: str) -> List[Dict[str, Any]]:
+def check_response_line(findings: Dict[str, Any], line_num: int, line: str):
+    """Check a single response line for status code issues."""
+    line_stripped = line.strip()
+    has_status = "status" in line
+
+    # Check for explicit 200 with error fields
+    if has_status and "200" in line and STATUS_200_RE.search(line):
+        lowered = line_stripped.lower()
+        # The fused regex only gates; the field reported is the first in ERROR_FIELDS
+        field = ERROR_WORD_RE.search(lowered) and next(
+            (error_field for error_field in ERROR_FIELDS if error_field in lowered), None)
+        if field:
+            findings["incorrect_status_codes"].append({
+                "line": line_num,
+                "code": line_stripped,
+                "reason": f"200 status with '{field}' field",
+                "severity": "HIGH"
+            })
+
+    # Check for error fields without status code
+    if not (has_status and ERROR_STATUS_RE.search(line)):
+        # Look for field in JSON-like structure
+        field = ":" in line_stripped and ERROR_FIELD_RE.search(line_stripped) and next(
+            (error_field for error_field, field_re in ERROR_FIELD_RES if field_re.search(line_stripped)), None)
+        if field:
+            findings["missing_status_codes"].append({
+                "line": line_num,
+                "code": line_stripped,
+                "reason": f"Response with '{field}' field but no 4xx/5xx status",
+                "severity": "HIGH"
+            })
+
+        # Check for boolean failure flags
+        if ("false" in line_stripped or "true" in line_stripped) and \
+                FAILURE_FLAGS_RE.search(line_stripped):
+            findings["missing_status_codes"].append({
+                "line": line_num,
+                "code": line_stripped,
+                "reason": f"Failure flag without proper HTTP status",
+                "severity": "HIGH"
+            })
+
+        # Check for status string values
+        if has_status and STATUS_STRINGS_RE.search(line_stripped):
+            findings["missing_status_codes"].append({
+                "line": line_num,
+                "code": line_stripped,
+                "reason": "String status instead of HTTP status code",
+                "severity": "HIGH"
+            })
+
+
+def scan_candidate(filepath: str, is_api_route: bool) -> Tuple[Optional[List], Optional[Dict[str, Any]]]:
+    """Scan a file if it is an API route or Server Action: (file_stamp, findings or None when skipped)."""
+    # Open each candidate once: API routes are always scanned, other
+    # files only when the head contains a "use server" directive
+    try:
+        with open(filepath, 'rb') as f:
+            st = os.fstat(f.fileno())
+            head = f.read(1000)
+            if not is_api_route and b"use server" not in head:
+                return file_stamp(st), None
+            data = head + f.read()
+    except OSError:
+        return None, None
+
+    content = data.decode('utf-8', errors='ignore').replace('\r\n', '\n')
+    return file_stamp(st, data), scan_content(filepath, content)
+
+
+def scan_directory(directory: str,
+                   cache: Optional[FindingsCache] = None) -> List[Dict[str, Any]]:
     """Scan directory for API files and status code issues."""
+    # Find all TypeScript/JavaScript files (skipping node_modules, .next, etc.)
+    return scan_files(directory, list(iter_source_files(directory)), cache)
+
+
+def scan_files(directory: str, paths: List[str],
+               cache: Optional[FindingsCache] = None) -> List[Dict[str, Any]]:
+    """Scan the given files under directory for status code issues."""
     all_findings = []
 
-    # Find all TypeScript/JavaScript files
-    for root, dirs, files in os.walk(directory):
-        # Skip node_modules, .next, etc.
-        dirs[:] = [d for d in dirs if d not in [
-            'node_modules', '.next', '.git', 'dist', 'build', 'out'
-        ]]
-
-        for file in files:
-            if file.endswith(('.ts', '.tsx', '.js', '.jsx')):
-                filepath = os.path.join(root, file)
-                relative_path = os.path.relpath(filepath, directory)
-
-                # Prioritize API routes
-                if is_api_route_file(relative_path):
-                    findings = scan_file(filepath)
-                    if (findings["incorrect_status_codes"] or
-                        findings["missing_status_codes"] or
-                        findings["console_logging"]):
-                        findings["is_api_route"] = True
-                        all_findings.append(findings)
-                # Also scan files with responses or server actions
-                elif "use server" in open(filepath, 'r', encoding='utf-8', errors='ignore').read(1000):
-                    findings = scan_file(filepath)
-                    if (findings["incorrect_status_codes"] or
-                        findings["missing_status_codes"] or
-                        findings["console_logging"]):
-                        findings["is_api_route"] = False
-                        all_findings.append(findings)
+    for filepath in paths:
+        # --files-from lists may name files in skipped directories (node_modules, .next, ...)
+        if not SKIP_DIRS.isdisjoint(Path(filepath).parts):
+            continue
+
+        relative_path = os.path.relpath(filepath, directory)
+        is_api_route = is_api_route_file(relative_path)
+
+        # Unchanged files reuse the previous run's result (including "skipped")
+        findings = cache.get(filepath, directory) if cache else MISS
+        if findings is MISS:
+            stamp, findings = scan_candidate(filepath, is_api_route)
+            if cache:
+                cache.put(filepath, stamp, findings, directory)
+
+        if findings and (findings["incorrect_status_codes"] or
+                         findings["missing_status_codes"] or
+                         findings["console_logging"]):
+            findings["is_api_route"] = is_api_route
+            all_findings.append(findings)
+
+    if cache:
+        cache.prune()
 
     return all_findings
 
@@ -299,11 +361,29 @@ def convert_to_standard_format(findings: List[Dict[str, Any]]) -> Dict[str, Any]
     }
 
 
+def run(directory: str = ".", files: Optional[List[str]] = None,
+        cache: Optional[FindingsCache] = None) -> Dict[str, Any]:
+    """Scan directory (or the given files) and return findings in the standard format."""
+    if files is None:
+        findings = scan_directory(directory, cache)
+    else:
+        findings = scan_files(directory, files, cache)
+    return convert_to_standard_format(findings)
+
+
 def main():
     """Main execution."""
     # Capture the original working directory where command was executed
     execution_dir = os.getcwd()
-    directory = sys.argv[1] if len(sys.argv) > 1 else "."
+
+    parser = argparse.ArgumentParser(description="Scan Next.js API routes for status code issues")
+    parser.add_argument("directory", nargs="?", default=".", help="Directory to scan")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Rescan every file instead of reusing cached findings")
+    parser.add_argument("--files-from", metavar="PATH",
+                        help="Scan the files listed in PATH (one per line) instead of walking directory")
+    args = parser.parse_args()
+    directory = args.directory
 
     if not os.path.isdir(directory):
         print(f"Error: {directory} is not a valid directory", file=sys.stderr)
@@ -311,7 +391,11 @@ def main():
 
     print(f"Scanning {directory} for API status code issues...", file=sys.stderr)
 
-    findings = scan_directory(directory)
+    cache = FindingsCache("scan-api-status", execution_dir, __file__, enabled=not args.no_cache)
+    if args.files_from:
+        findings = scan_files(directory, read_file_list(args.files_from), cache)
+    else:
+        findings = scan_directory(directory, cache)
     summary = generate_summary(findings)
 
     # Original format for stdout
@@ -13,22 +13,136 @@ import os
 import re
 import json
 import sys
+import mmap
+import argparse
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from scan_cache import MISS, FindingsCache, file_stamp
+from source_files import SKIP_DIRS, iter_source_files, read_file_list
+from worker_pool import map_in_pool
+
+# Files at least this large are memory-mapped instead of read into the heap
+MMAP_THRESHOLD = 64 * 1024
+
+# Raw file bytes (small files) or a read-only mmap (large files)
+Content = Union[bytes, mmap.mmap]
+
+# Pattern tables, compiled once at import: (anchor, regex, issue, fix[, severity]).
+# Patterns are bytes regexes run over the raw file content (no decode pass), so
+# whitespace classes exclude newlines ([^\S\n]) to keep every match on one line.
+# The anchor is a literal every match contains; files without it skip the regex
+# (None means no useful anchor, always run).
+HYDRATION_PATTERNS = [
+    (b'new Date', re.compile(rb'new Date\(\)'), 'new Date()',
+     'Date objects cause hydration mismatches - use useEffect'),
+    (b'Math.random', re.compile(rb'Math\.random\(\)'), 'Math.random()',
+     'Random values cause hydration mismatches - use useEffect'),
+    (b'Date.now', re.compile(rb'Date\.now\(\)'), 'Date.now()',
+     'Timestamps cause hydration mismatches - use useEffect'),
+    (b'typeof window', re.compile(rb'typeof window !== ["\']undefined["\']'), 'window check in render',
+     'Move to useEffect to avoid hydration mismatch'),
+    (b'window &&', re.compile(rb'window &&'), 'window check in render',
+     'Move to useEffect to avoid hydration mismatch'),
+]
+
+TYPESCRIPT_PATTERNS = [
+    (b'any', re.compile(rb':[^\S\n]*any[^\S\n]*[,;=)]'), 'any type',
+     'Use specific types instead of any', 'Medium'),
+    (b'any', re.compile(rb'as[^\S\n]+any'), 'any type assertion',
+     'Use proper type definitions', 'Medium'),
+    (b'@ts-ignore', re.compile(rb'@ts-ignore'), '@ts-ignore comment',
+     'Fix the underlying type error', 'High'),
+    (b'@ts-nocheck', re.compile(rb'@ts-nocheck'), '@ts-nocheck comment',
+     'Enable type checking for this file', 'High'),
+    (None, re.compile(rb'![^\S\n]*[.;]'), 'non-null assertion',
+     'Use optional chaining or proper type guards', 'Low'),
+]
+
+# Client-only hooks and browser APIs that break Server Components
+CLIENT_HOOKS = (
+    'useState', 'useEffect', 'useContext', 'useReducer',
+    'useCallback', 'useMemo', 'useRef', 'useLayoutEffect'
+)
+BROWSER_APIS = ('window', 'document', 'localStorage', 'sessionStorage', 'navigator')
+CLIENT_HOOKS_RE = re.compile(rb'\b(' + '|'.join(CLIENT_HOOKS).encode() + rb')[^\S\n]*\(')
+BROWSER_API_RE = re.compile(rb'\b(' + '|'.join(BROWSER_APIS).encode() + rb')[^\S\n]*\.')
+BROWSER_API_ANCHORS = tuple(api.encode() for api in BROWSER_APIS)
+
+NULL_REFERENCE_RE = re.compile(rb'\.\w+\(.*\)(?!.*\?\.)')
+EXPORT_ASYNC_RE = re.compile(rb'export async function')
+FETCH_CALL_RE = re.compile(rb'fetch\(')
+NEWLINE_RE = re.compile(rb'\n')
+
+# Per-file applicability flags, computed once so inapplicable check families
+# are never dispatched
+CLIENT_COMPONENT = 1  # "use client" directive: server component checks do not apply
+ROUTE_HANDLER = 2     # route.ts exporting async handlers: try/catch check applies
+USES_FETCH = 4        # calls fetch(): fetch error handling check applies
+
+
+def iter_match_lines(pattern: re.Pattern, content: Content,
+                     newlines: List[int]) -> Iterator[Tuple[int, str, List[re.Match]]]:
+    """Yield (line_num, line, matches) for each line of content that pattern matches"""
+    current_line, matches = 0, []
+    for match in pattern.finditer(content):
+        line_num = bisect_left(newlines, match.start()) + 1
+        if line_num != current_line:
+            if matches:
+                yield current_line, line_at(content, newlines, current_line), matches
+            current_line, matches = line_num, []
+        matches.append(match)
+
+    if matches:
+        yield current_line, line_at(content, newlines, current_line), matches
+
+
+def line_at(content: Content, newlines: List[int], line_num: int) -> str:
+    """Return the decoded text of a 1-based line given the offsets of every newline"""
+    start = newlines[line_num - 2] + 1 if line_num > 1 else 0
+    end = newlines[line_num - 1] if line_num <= len(newlines) else len(content)
+    # Decoding happens here, only for lines that produced a match
+    return content[start:end].decode('utf-8', errors='ignore')
+
+
+def contains(content: Content, needle: bytes) -> bool:
+    """Substring test that also works on mmap (whose `in` only accepts single bytes)"""
+    return content.find(needle) != -1
+
+
+def file_flags(file_path: Path, content: Content) -> int:
+    """Return the applicability flags for a file"""
+    flags = 0
+    if contains(content, b'"use client"') or contains(content, b"'use client'"):
+        flags |= CLIENT_COMPONENT
+    if 'route.ts' in str(file_path) and contains(content, b'export async function'):
+        flags |= ROUTE_HANDLER
+    if contains(content, b'fetch('):
+        flags |= USES_FETCH
+    return flags
+
 
 class DebugScanner:
-    def __init__(self, root_dir: str = "."):
+    def __init__(self, root_dir: str = ".", cache: Optional[FindingsCache] = None,
+                 pool: Optional[ProcessPoolExecutor] = None):
         self.root_dir = Path(root_dir)
+        # Worker pool shared by scan-all; None creates one per scan
+        self.pool = pool
         self.findings: List[Dict] = []
         self.scanned_files: Set[str] = set()
+        self.cache = cache
 
-    def scan(self) -> Dict:
-        """Run all debug scans"""
+    def scan(self, files: Optional[List[str]] = None) -> Dict:
+        """Run all debug scans (over files if given, else a walk of root_dir)"""
         print(f"Scanning {self.root_dir} for common debug issues...")
 
-        # Scan TypeScript/JavaScript files
-        for ext in ['.tsx', '.ts', '.jsx', '.js']:
-            self._scan_files(f"**/*{ext}")
+        # Collect TypeScript/JavaScript files, then scan them in parallel
+        if files is None:
+            files = list(iter_source_files(str(self.root_dir)))
+        self._scan_files(files)
 
         # Scan TypeScript config
         self._scan_tsconfig()
@@ -40,60 +154,80 @@ class DebugScanner:
             'findings': self.findings
         }
 
-    def _scan_files(self, pattern: str):
-        """Scan files matching pattern"""
-        for file_path in self.root_dir.glob(pattern):
-            if self._should_skip(file_path):
-                continue
-
-            self.scanned_files.add(str(file_path))
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            self._scan_file_content(file_path, content)
+    def _scan_files(self, paths: List[str]):
+        """Scan files, reusing cached findings for files unchanged since the last run"""
+        paths = [path_str for path_str in paths if not self._should_skip(Path(path_str))]
+
+        # Findings are stored relative to root_dir, so it is part of the cache key
+        cache_context = os.path.abspath(self.root_dir)
+        results: Dict[str, List[Dict]] = {}
+        if self.cache:
+            for path_str in paths:
+                cached = self.cache.get(path_str, cache_context)
+                if cached is not MISS:
+                    results[path_str] = cached
+
+        misses = [path_str for path_str in paths if path_str not in results]
+        if misses:
+            for path_str, (stamp, findings) in self._scan_in_workers(misses).items():
+                results[path_str] = findings
+                if self.cache:
+                    self.cache.put(path_str, stamp, findings, cache_context)
+            if self.cache:
+                self.cache.prune()
+
+        for path_str in paths:
+            self.scanned_files.add(path_str)
+            self.findings.extend(results[path_str])
+
+    def _scan_in_workers(self, paths: List[str]) -> Dict[str, Tuple[List, List[Dict]]]:
+        """Scan files in the worker pool and return (file_stamp, findings) keyed by path"""
+        worker = partial(scan_one, str(self.root_dir))
+        return dict(zip(paths, map_in_pool(worker, paths, self.pool)))
 
     def _should_skip(self, file_path: Path) -> bool:
         """Check if file should be skipped"""
-        skip_dirs = {'node_modules', '.next', 'out', 'dist', 'build', '.git'}
-        return any(skip_dir in file_path.parts for skip_dir in skip_dirs)
+        # One set operation over the path components instead of a loop per skipped dir
+        return not SKIP_DIRS.isdisjoint(file_path.parts)
 
-    def _scan_file_content(self, file_path: Path, content: str):
+    def _scan_file_content(self, file_path: Path, content: Content):
         """Scan file content for debug issues"""
-        lines = content.split('\n')
-        is_client_component = '"use client"' in content or "'use client'" in content
+        # One finditer pass per pattern over the whole file; line numbers come
+        # from bisecting the newline offsets instead of splitting into lines
+        newlines = [m.start() for m in NEWLINE_RE.finditer(content)]
+        flags = file_flags(file_path, content)
+
+        first_finding = len(self.findings)
 
-        for line_num, line in enumerate(lines, 1):
-            # Hydration error patterns
-            self._check_hydration_issues(file_path, line_num, line)
+        # Hydration error patterns
+        self._check_hydration_issues(file_path, content, newlines)
 
-            # TypeScript issues
-            self._check_typescript_issues(file_path, line_num, line)
+        # TypeScript issues
+        self._check_typescript_issues(file_path, content, newlines)
 
-            # Client/Server mismatch
-            if not is_client_component:
-                self._check_server_component_issues(file_path, line_num, line)
+        # Client/Server mismatch
+        if not flags & CLIENT_COMPONENT:
+            self._check_server_component_issues(file_path, content, newlines)
 
-            # Runtime error patterns
-            self._check_runtime_errors(file_path, line_num, line)
+        # Runtime error patterns
+        self._check_runtime_errors(file_path, content, newlines, flags)
 
-            # Missing error boundaries
-            self._check_error_handling(file_path, line_num, line, content)
+        # Missing error boundaries
+        if flags & USES_FETCH:
+            self._check_error_handling(file_path, content, newlines)
 
-    def _check_hydration_issues(self, file_path: Path, line_num: int, line: str):
+        # Checks run pattern by pattern; restore line order (stable, so per-line
+        # check order is unchanged)
+        self.findings[first_finding:] = sorted(
+            self.findings[first_finding:], key=lambda finding: finding['line']
+        )
+
+    def _check_hydration_issues(self, file_path: Path, content: Content, newlines: List[int]):
         """Check for common hydration error causes"""
-        patterns = [
-            (r'new Date\(\)', 'new Date()',
-             'Date objects cause hydration mismatches - use useEffect'),
-            (r'Math\.random\(\)', 'Math.random()',
-             'Random values cause hydration mismatches - use useEffect'),
-            (r'Date\.now\(\)', 'Date.now()',
-             'Timestamps cause hydration mismatches - use useEffect'),
-            (r'typeof window !== ["\']undefined["\']', 'window check in render',
-             'Move to useEffect to avoid hydration mismatch'),
-            (r'window &&', 'window check in render',
-             'Move to useEffect to avoid hydration mismatch'),
-        ]
-
-        for pattern, issue, fix in patterns:
-            if re.search(pattern, line):
+        for anchor, pattern, issue, fix in HYDRATION_PATTERNS:
+            if not contains(content, anchor):
+                continue
+            for line_num, line, _ in iter_match_lines(pattern, content, newlines):
                 self._add_finding(
                     file_path, line_num, line,
                     'Hydration: Client/Server Mismatch',
@@ -102,23 +236,12 @@ class DebugScanner:
                     'High'
                 )
 
-    def _check_typescript_issues(self, file_path: Path, line_num: int, line: str):
+    def _check_typescript_issues(self, file_path: Path, content: Content, newlines: List[int]):
         """Check for TypeScript anti-patterns"""
-        patterns = [
-            (r':\s*any\s*[,;=)]', 'any type',
-             'Use specific types instead of any', 'Medium'),
-            (r'as\s+any', 'any type assertion',
-             'Use proper type definitions', 'Medium'),
-            (r'@ts-ignore', '@ts-ignore comment',
-             'Fix the underlying type error', 'High'),
-            (r'@ts-nocheck', '@ts-nocheck comment',
-             'Enable type checking for this file', 'High'),
-            (r'!\s*[.;]', 'non-null assertion',
-             'Use optional chaining or proper type guards', 'Low'),
-        ]
-
-        for pattern, issue, fix, severity in patterns:
-            if re.search(pattern, line):
+        for anchor, pattern, issue, fix, severity in TYPESCRIPT_PATTERNS:
+            if anchor and not contains(content, anchor):
+                continue
+            for line_num, line, _ in iter_match_lines(pattern, content, newlines):
                 self._add_finding(
                     file_path, line_num, line,
                     f'TypeScript: {issue.title()}',
@@ -127,29 +250,28 @@ class DebugScanner:
                     severity
                 )
 
-    def _check_server_component_issues(self, file_path: Path, line_num: int, line: str):
+    def _check_server_component_issues(self, file_path: Path, content: Content,
+                                       newlines: List[int]):
         """Check for issues in Server Components"""
-        # Check for client-only hooks in Server Components
-        client_hooks = [
-            'useState', 'useEffect', 'useContext', 'useReducer',
-            'useCallback', 'useMemo', 'useRef', 'useLayoutEffect'
-        ]
-
-        for hook in client_hooks:
-            if re.search(rf'\b{hook}\s*\(', line):
-                self._add_finding(
-                    file_path, line_num, line,
-                    'Server Component: Client Hook Usage',
-                    f'{hook} cannot be used in Server Components',
-                    'Add "use client" directive or move to Client Component',
-                    'Critical'
-                )
+        # Check for client-only hooks in Server Components (one finding per distinct hook)
+        if contains(content, b'use'):
+            for line_num, line, matches in iter_match_lines(CLIENT_HOOKS_RE, content, newlines):
+                found = {m.group(1).decode() for m in matches}
+                for hook in (hook for hook in CLIENT_HOOKS if hook in found):
+                    self._add_finding(
+                        file_path, line_num, line,
+                        'Server Component: Client Hook Usage',
+                        f'{hook} cannot be used in Server Components',
+                        'Add "use client" directive or move to Client Component',
+                        'Critical'
+                    )
 
         # Check for browser APIs in Server Components
-        browser_apis = ['window', 'document', 'localStorage', 'sessionStorage', 'navigator']
-
-        for api in browser_apis:
-            if re.search(rf'\b{api}\s*\.', line):
+        if not any(contains(content, anchor) for anchor in BROWSER_API_ANCHORS):
+            return
+        for line_num, line, matches in iter_match_lines(BROWSER_API_RE, content, newlines):
+            found = {m.group(1).decode() for m in matches}
+            for api in (api for api in BROWSER_APIS if api in found):
                 self._add_finding(
                     file_path, line_num, line,
                     'Server Component: Browser API Usage',
@@ -158,14 +280,20 @@ class DebugScanner:
                     'High'
                 )
 
-    def _check_runtime_errors(self, file_path: Path, line_num: int, line: str):
+    def _check_runtime_errors(self, file_path: Path, content: Content, newlines: List[int],
+                              flags: int):
         """Check for common runtime error patterns"""
-        # Check for API routes without error handling
-        if 'export async function' in line and 'route.ts' in str(file_path):
-            self._check_api_error_handling(file_path, line_num, line)
-
-        # Check for missing null checks
-        if re.search(r'\.\w+\(.*\)(?!.*\?\.)', line):
+        # Check for API routes without error handling; the file-level try/catch
+        # heuristic is only computed (once) for route handlers that need it
+        if flags & ROUTE_HANDLER:
+            has_try_catch = contains(content, b'try') and contains(content, b'catch')
+            for line_num, line, _ in iter_match_lines(EXPORT_ASYNC_RE, content, newlines):
+                self._check_api_error_handling(file_path, line_num, line, has_try_catch)
+
+        # Check for missing null checks (only lines mentioning null/undefined qualify)
+        if not (contains(content, b'null') or contains(content, b'undefined')):
+            return
+        for line_num, line, _ in iter_match_lines(NULL_REFERENCE_RE, content, newlines):
             if 'null' in line or 'undefined' in line:
                 self._add_finding(
                     file_path, line_num, line,
@@ -175,42 +303,39 @@ class DebugScanner:
                     'Low'
                 )
 
-    def _check_api_error_handling(self, file_path: Path, line_num: int, line: str):
+    def _check_api_error_handling(self, file_path: Path, line_num: int, line: str,
+                                  has_try_catch: bool):
         """Check API routes for error handling"""
-        # Read context to check for try-catch
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            # Simple check for try-catch in same function
-            if 'try' not in content or 'catch' not in content:
-                self._add_finding(
-                    file_path, line_num, line,
-                    'Runtime: Missing Error Handling',
-                    'API route without try-catch block',
-                    'Wrap async operations in try-catch',
-                    'Medium'
-                )
-        except:
-            pass
+        # Simple check for try-catch anywhere in the file
+        if not has_try_catch:
+            self._add_finding(
+                file_path, line_num, line,
+                'Runtime: Missing Error Handling',
+                'API route without try-catch block',
+                'Wrap async operations in try-catch',
+                'Medium'
+            )
 
-    def _check_error_handling(self, file_path: Path, line_num: int, line: str, content: str):
+    def _check_error_handling(self, file_path: Path, content: Content, newlines: List[int]):
         """Check for missing error handling"""
+        # Simple heuristic: file-level error handling keywords, checked once per file
+        has_error_handling = any(
+            contains(content, keyword)
+            for keyword in [b'.catch(', b'try', b'catch', b'error']
+        )
+        if has_error_handling:
+            return
+
         # Check for fetch without error handling
-        if 'fetch(' in line:
-            # Simple heuristic: check if there's error handling nearby
-            has_error_handling = any(
-                keyword in content
-                for keyword in ['.catch(', 'try', 'catch', 'error']
+        for line_num, line, _ in iter_match_lines(FETCH_CALL_RE, content, newlines):
+            self._add_finding(
+                file_path, line_num, line,
+                'Runtime: Missing Fetch Error Handling',
+                'Fetch without error handling',
+                'Add .catch() or try-catch for fetch errors',
+                'Low'
             )
 
-            if not has_error_handling:
-                self._add_finding(
-                    file_path, line_num, line,
-                    'Runtime: Missing Fetch Error Handling',
-                    'Fetch without error handling',
-                    'Add .catch() or try-catch for fetch errors',
-                    'Low'
-                )
-
     def _scan_tsconfig(self):
         """Scan TypeScript configuration"""
         tsconfig_path = self.root_dir / 'tsconfig.json'
@@ -263,14 +388,46 @@ class DebugScanner:
         return breakdown
 
 
+def scan_one(root_dir: str, path_str: str) -> Tuple[List, List[Dict]]:
+    """Scan a single file and return (file_stamp, findings) (runs in a worker process)"""
+    scanner = DebugScanner(root_dir)
+    file_path = Path(path_str)
+    with open(path_str, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size < MMAP_THRESHOLD:
+            content = f.read()
+            scanner._scan_file_content(file_path, content)
+            stamp = file_stamp(st, content)
+        else:
+            # Large files are scanned in place rather than copied into the heap
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                scanner._scan_file_content(file_path, content)
+                stamp = file_stamp(st, content)
+    return stamp, scanner.findings
+
+
+def run(root_dir: str = '.', files: Optional[List[str]] = None,
+        cache: Optional[FindingsCache] = None,
+        pool: Optional[ProcessPoolExecutor] = None) -> Dict:
+    """Scan root_dir (or the given files) and return the results dict"""
+    return DebugScanner(root_dir, cache, pool).scan(files)
+
+
 def main():
     """Main execution"""
     # Capture the original working directory where command was executed
     original_cwd = os.getcwd()
-    root_dir = sys.argv[1] if len(sys.argv) > 1 else "."
 
-    scanner = DebugScanner(root_dir)
-    results = scanner.scan()
+    parser = argparse.ArgumentParser(description='Scan a Next.js project for common debug issues')
+    parser.add_argument('root_dir', nargs='?', default='.', help='Directory to scan')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rescan every file instead of reusing cached findings')
+    parser.add_argument('--files-from', metavar='PATH',
+                        help='Scan the files listed in PATH (one per line) instead of walking root_dir')
+    args = parser.parse_args()
+
+    cache = FindingsCache('scan-debug', original_cwd, __file__, enabled=not args.no_cache)
+    results = run(args.root_dir, read_file_list(args.files_from) if args.files_from else None, cache)
 
     # Print summary
     print(f"\n{'='*60}")
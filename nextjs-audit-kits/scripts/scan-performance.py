@@ -12,24 +12,211 @@ Scans Next.js projects for performance anti-patterns including:
 
 import os
 import re
-import json
 import sys
+import mmap
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from json_output import save_json
+from scan_cache import MISS, FindingsCache, file_stamp
+from source_files import SKIP_DIRS, iter_source_files, read_file_list
+from worker_pool import map_in_pool
+
+try:
+    import hyperscan  # Optional: SIMD multi-pattern matching for the anchor pass
+except ImportError:
+    hyperscan = None
+
+# Files at least this large are memory-mapped rather than read into the heap
+MMAP_THRESHOLD = 64 * 1024
+
+# Raw file content: bytes for small files, a read-only mmap for large ones
+Content = Union[bytes, mmap.mmap]
+
+# Patterns are compiled once at import rather than looked up in re's cache per line
+HEAVY_COMPONENTS = ['Modal', 'Chart', 'Editor', 'Map', 'Calendar', 'CodeEditor']
+FETCH_CALL_RE = re.compile(r'fetch\([^)]+\)')
+
+# Checks that are nothing but "pattern matches -> constant finding", as
+# (pattern, title, problem, fix, severity) rows driven by one loop instead of a
+# method call each. One finding per matching row; alternatives that used to be
+# or-ed in a single check share a row, so they still report once per line.
+LARGE_IMPORT_CHECKS = tuple(
+    (re.compile(pattern), 'Bundle Size: Large Import', f'Importing {library} increases bundle size',
+     f'Use {suggestion} instead', 'Medium')
+    for pattern, library, suggestion in [
+        (r'import\s+.*\s+from\s+["\']moment["\']', 'moment.js', 'date-fns or dayjs'),
+        (r'import\s+.*\s+from\s+["\']lodash["\']', 'lodash', 'specific lodash functions'),
+        (r'import\s+\*\s+as\s+\w+\s+from', 'namespace import', 'specific imports'),
+    ]
+)
+INLINE_FUNCTION_CHECKS = (
+    (re.compile(r'onClick=\{\(\)\s*=>|onChange=\{\(\)\s*=>'),
+     'Rendering: Inline Arrow Function',
+     'Inline arrow functions create new references on each render',
+     'Use useCallback to memoize event handlers',
+     'Low'),
+)
+INLINE_OBJECT_CHECKS = (
+    (re.compile(r'style=\{\{|className=\{`.*\$\{'),
+     'Rendering: Inline Object',
+     'Inline objects create new references on each render',
+     'Use useMemo or move object outside component',
+     'Low'),
+)
+IMG_TAG_CHECKS = (
+    (re.compile(r'<img\s'),
+     'Image Optimization: Native img Tag',
+     'Using native <img> tag misses Next.js optimizations',
+     'Use next/image Image component',
+     'High'),
+)
+
+# Per-line dispatch in report order: (family, table checks, check method or None).
+# Only checks with extra conditions beyond a single pattern remain methods.
+LINE_CHECKS = (
+    ('imports', LARGE_IMPORT_CHECKS, '_check_missing_dynamic_imports'),
+    ('inline_function', INLINE_FUNCTION_CHECKS, None),
+    ('inline_object', INLINE_OBJECT_CHECKS, None),
+    ('img_tag', IMG_TAG_CHECKS, None),
+    ('image', (), '_check_image_dimensions'),
+    ('fetch', (), '_check_fetch_caching'),
+)
+
+# Literal anchors every match of a check family contains -> family. They are
+# fused into one alternation, so a single search per line finds the families
+# worth checking (plain literals, no groups: sre scans those with a fast prefix check).
+# Anchors are ASCII and matched as bytes in the raw file, with no decode pass.
+LINE_ANCHORS = {
+    b'import': 'imports',
+    b'onClick={()': 'inline_function',
+    b'onChange={()': 'inline_function',
+    b'style={{': 'inline_object',
+    b'className={`': 'inline_object',
+    b'<img': 'img_tag',
+    b'<Image': 'image',
+    b'fetch(': 'fetch',
+}
+LINE_ANCHORS_RE = re.compile(b'|'.join(map(re.escape, LINE_ANCHORS)))
+ANCHOR_LIST = list(LINE_ANCHORS)
+
+
+def compile_anchor_database():
+    """Compile the anchors into a Hyperscan database (None when hyperscan is missing)"""
+    if hyperscan is None:
+        return None
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[re.escape(anchor) for anchor in ANCHOR_LIST],
+        ids=list(range(len(ANCHOR_LIST))),
+        elements=len(ANCHOR_LIST),
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(ANCHOR_LIST),
+    )
+    return database
+
+
+ANCHOR_DATABASE = compile_anchor_database()
+
+
+def on_anchor_match(anchor_id: int, start: int, end: int, flags: int,
+                    matches: List[Tuple[int, bytes]]):
+    """Hyperscan match callback: record (offset, anchor)"""
+    matches.append((start, ANCHOR_LIST[anchor_id]))
+
+
+def find_anchors(content: Content) -> List[Tuple[int, bytes]]:
+    """Return (offset, anchor) for every anchor in content, in offset order"""
+    if ANCHOR_DATABASE is None:
+        return [(match.start(), match.group()) for match in LINE_ANCHORS_RE.finditer(content)]
+
+    matches: List[Tuple[int, bytes]] = []
+    ANCHOR_DATABASE.scan(content, match_event_handler=on_anchor_match, context=matches)
+    # Hyperscan reports matches in order of their end offset
+    matches.sort()
+    return matches
+
+
+def count_newlines(content: Content, start: int, end: int) -> int:
+    """Count newlines in content[start:end] at C speed"""
+    if isinstance(content, mmap.mmap):
+        # mmap has no count(); the slice only spans the gap between two anchors
+        return content[start:end].count(b'\n')
+    return content.count(b'\n', start, end)
+
+
+def iter_anchor_lines(content: Content,
+                      anchors: List[Tuple[int, bytes]]) -> Iterator[Tuple[int, str, List[bytes]]]:
+    """Yield (line_num, line, anchors) for each line holding at least one anchor"""
+    line_num, counted_to = 1, 0
+    line_start = line_end = -1
+    line_anchors: List[bytes] = []
+    for offset, anchor in anchors:
+        if offset > line_end:
+            if line_anchors:
+                yield line_num, decode_line(content, line_start, line_end), line_anchors
+            # Advance the line number by the newlines since the previous anchor line
+            line_num += count_newlines(content, counted_to, offset)
+            counted_to = offset
+            line_start = content.rfind(b'\n', 0, offset) + 1
+            line_end = content.find(b'\n', offset)
+            if line_end == -1:
+                line_end = len(content)
+            line_anchors = []
+        line_anchors.append(anchor)
+
+    if line_anchors:
+        yield line_num, decode_line(content, line_start, line_end), line_anchors
+
+
+def decode_line(content: Content, start: int, end: int) -> str:
+    """Return the decoded text of content[start:end], a line without its newline"""
+    # Drop the \r of a CRLF line ending, as text-mode reading would
+    if end > start and content[end - 1] == 13:
+        end -= 1
+    # Decoding happens here, only for lines that hold an anchor
+    return content[start:end].decode('utf-8', errors='ignore')
+
+
+class Finding(NamedTuple):
+    """A single issue; a plain tuple, so cheap to build, pickle from workers and cache"""
+    file: str
+    line: int
+    code: str
+    title: str
+    problem: str
+    fix: str
+    severity: str
+
 
 class PerformanceScanner:
-    def __init__(self, root_dir: str = "."):
+    def __init__(self, root_dir: str = ".", cache: Optional[FindingsCache] = None,
+                 pool: Optional[ProcessPoolExecutor] = None):
         self.root_dir = Path(root_dir)
-        self.findings: List[Dict] = []
+        # Worker pool shared by scan-all; None creates one per scan
+        self.pool = pool
+        self.findings: List[Finding] = []
         self.scanned_files: Set[str] = set()
+        self.cache = cache
+        # Relative path of each file that produced a finding, computed once per file
+        self._relative_paths: Dict[Path, str] = {}
+        # LINE_CHECKS with its method names bound once, not looked up per line
+        self._line_checks = [
+            (family, checks, getattr(self, method) if method else None)
+            for family, checks, method in LINE_CHECKS
+        ]
 
-    def scan(self) -> Dict:
+    def scan(self, files: Optional[List[str]] = None) -> Dict:
         """Run all performance scans"""
         print(f"Scanning {self.root_dir} for performance issues...")
 
-        # Scan TypeScript/JavaScript files
-        for ext in ['.tsx', '.ts', '.jsx', '.js']:
-            self._scan_files(f"**/*{ext}")
+        # Scan TypeScript/JavaScript files (a pre-enumerated list if given, else a
+        # single walk that never descends into node_modules and other skipped dirs)
+        if files is None:
+            files = iter_source_files(str(self.root_dir))
+        self._scan_paths(Path(file) for file in files)
 
         # Scan configuration files
         self._scan_config_files()
@@ -38,71 +225,75 @@ class PerformanceScanner:
             'total_files_scanned': len(self.scanned_files),
             'total_issues': len(self.findings),
             'severity_breakdown': self._get_severity_breakdown(),
-            'findings': self.findings
+            # Findings become dicts only here, once, for the JSON report
+            'findings': [finding._asdict() for finding in self.findings]
         }
 
-    def _scan_files(self, pattern: str):
-        """Scan files matching pattern"""
-        for file_path in self.root_dir.glob(pattern):
-            if self._should_skip(file_path):
-                continue
-
-            self.scanned_files.add(str(file_path))
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            self._scan_file_content(file_path, content)
+    def _scan_paths(self, paths: Iterable[Path]):
+        """Scan the given files in parallel, reusing cached findings for unchanged files"""
+        path_strs = [str(file_path) for file_path in paths if not self._should_skip(file_path)]
+
+        # Findings are stored relative to root_dir, so it is part of the cache key
+        cache_context = os.path.abspath(self.root_dir)
+        results: Dict[str, List[Finding]] = {}
+        if self.cache:
+            for path_str in path_strs:
+                cached = self.cache.get(path_str, cache_context)
+                if cached is not MISS:
+                    # Cached as JSON arrays, one per finding
+                    results[path_str] = [Finding(*finding) for finding in cached]
+
+        misses = [path_str for path_str in path_strs if path_str not in results]
+        if misses:
+            for path_str, (stamp, findings) in zip(misses, self._scan_in_workers(misses)):
+                results[path_str] = findings
+                if self.cache:
+                    self.cache.put(path_str, stamp, findings, cache_context)
+            if self.cache:
+                self.cache.prune()
+
+        for path_str in path_strs:
+            self.scanned_files.add(path_str)
+            self.findings.extend(results[path_str])
+
+    def _scan_in_workers(self, paths: List[str]) -> List[Tuple[List, List[Finding]]]:
+        """Scan files in the worker pool and return (file_stamp, findings) in path order"""
+        return map_in_pool(partial(scan_one, str(self.root_dir)), paths, self.pool)
 
     def _should_skip(self, file_path: Path) -> bool:
         """Check if file should be skipped"""
-        skip_dirs = {'node_modules', '.next', 'out', 'dist', 'build', '.git'}
-        return any(skip_dir in file_path.parts for skip_dir in skip_dirs)
-
-    def _scan_file_content(self, file_path: Path, content: str):
-        """Scan file content for issues"""
-        lines = content.split('\n')
-
-        for line_num, line in enumerate(lines, 1):
-            # Bundle size issues
-            self._check_large_imports(file_path, line_num, line)
-            self._check_missing_dynamic_imports(file_path, line_num, line)
-
-            # Rendering performance
-            self._check_inline_functions(file_path, line_num, line)
-            self._check_inline_objects(file_path, line_num, line)
-
-            # Image optimization
-            self._check_native_img_tags(file_path, line_num, line)
-            self._check_image_dimensions(file_path, line_num, line)
-
-            # Caching issues
-            self._check_fetch_caching(file_path, line_num, line)
-
-    def _check_large_imports(self, file_path: Path, line_num: int, line: str):
-        """Check for large library imports"""
-        patterns = [
-            (r'import\s+.*\s+from\s+["\']moment["\']', 'moment.js', 'date-fns or dayjs'),
-            (r'import\s+.*\s+from\s+["\']lodash["\']', 'lodash', 'specific lodash functions'),
-            (r'import\s+\*\s+as\s+\w+\s+from', 'namespace import', 'specific imports'),
-        ]
-
-        for pattern, library, suggestion in patterns:
-            if re.search(pattern, line):
-                self._add_finding(
-                    file_path, line_num, line,
-                    'Bundle Size: Large Import',
-                    f'Importing {library} increases bundle size',
-                    f'Use {suggestion} instead',
-                    'Medium'
-                )
+        # One set operation over the path components instead of a loop per skipped dir
+        return not SKIP_DIRS.isdisjoint(file_path.parts)
+
+    def _scan_file_content(self, file_path: Path, content: Content):
+        """Scan raw file content for issues"""
+        # A file without a single anchor can't match any check
+        anchors = find_anchors(content)
+        if not anchors:
+            return
+
+        # One anchor pass over the whole file instead of splitting it into lines:
+        # only lines holding an anchor are sliced out and decoded (the checks run on
+        # text), and line numbers come from counting newlines between anchors
+        for line_num, line, line_anchors in iter_anchor_lines(content, anchors):
+            families = {LINE_ANCHORS[anchor] for anchor in line_anchors}
+
+            # Bundle size, rendering, image and caching checks, table-driven
+            for family, checks, check_method in self._line_checks:
+                if family not in families:
+                    continue
+                for pattern, title, problem, fix, severity in checks:
+                    if pattern.search(line):
+                        self._add_finding(file_path, line_num, line, title, problem, fix, severity)
+                if check_method:
+                    check_method(file_path, line_num, line)
 
     def _check_missing_dynamic_imports(self, file_path: Path, line_num: int, line: str):
         """Check for heavy components that should be lazy loaded"""
-        patterns = [
-            'Modal', 'Chart', 'Editor', 'Map', 'Calendar', 'CodeEditor'
-        ]
-
+        # 'dynamic' not in line also rules out next/dynamic imports
         if 'import' in line and 'dynamic' not in line:
-            for pattern in patterns:
-                if pattern in line and not re.search(r'next/dynamic', line):
+            for pattern in HEAVY_COMPONENTS:
+                if pattern in line:
                     self._add_finding(
                         file_path, line_num, line,
                         'Code Splitting: Missing Dynamic Import',
@@ -111,55 +302,23 @@ class PerformanceScanner:
                         'Medium'
                     )
 
-    def _check_inline_functions(self, file_path: Path, line_num: int, line: str):
-        """Check for inline arrow functions in JSX"""
-        if re.search(r'onClick=\{\(\)\s*=>', line) or re.search(r'onChange=\{\(\)\s*=>', line):
-            self._add_finding(
-                file_path, line_num, line,
-                'Rendering: Inline Arrow Function',
-                'Inline arrow functions create new references on each render',
-                'Use useCallback to memoize event handlers',
-                'Low'
-            )
-
-    def _check_inline_objects(self, file_path: Path, line_num: int, line: str):
-        """Check for inline object literals in JSX"""
-        if re.search(r'style=\{\{', line) or re.search(r'className=\{`.*\$\{', line):
-            self._add_finding(
-                file_path, line_num, line,
-                'Rendering: Inline Object',
-                'Inline objects create new references on each render',
-                'Use useMemo or move object outside component',
-                'Low'
-            )
-
-    def _check_native_img_tags(self, file_path: Path, line_num: int, line: str):
-        """Check for native img tags instead of next/image"""
-        if re.search(r'<img\s', line):
+    def _check_image_dimensions(self, file_path: Path, line_num: int, line: str):
+        """Check for images without dimensions"""
+        # Literal substring tests only; a fill prop settles it before the size checks
+        if '<Image' not in line or 'fill' in line:
+            return
+        if 'width=' not in line or 'height=' not in line:
             self._add_finding(
                 file_path, line_num, line,
-                'Image Optimization: Native img Tag',
-                'Using native <img> tag misses Next.js optimizations',
-                'Use next/image Image component',
-                'High'
+                'Image Optimization: Missing Dimensions',
+                'Images without width/height cause layout shift',
+                'Add width and height props or use fill',
+                'Medium'
             )
 
-    def _check_image_dimensions(self, file_path: Path, line_num: int, line: str):
-        """Check for images without dimensions"""
-        if '<Image' in line:
-            if not re.search(r'width=', line) or not re.search(r'height=', line):
-                if not re.search(r'fill', line):
-                    self._add_finding(
-                        file_path, line_num, line,
-                        'Image Optimization: Missing Dimensions',
-                        'Images without width/height cause layout shift',
-                        'Add width and height props or use fill',
-                        'Medium'
-                    )
-
     def _check_fetch_caching(self, file_path: Path, line_num: int, line: str):
         """Check for fetch calls without cache configuration"""
-        if re.search(r'fetch\([^)]+\)', line):
+        if FETCH_CALL_RE.search(line):
             if 'cache:' not in line and 'next:' not in line:
                 self._add_finding(
                     file_path, line_num, line,
@@ -198,32 +357,60 @@ class PerformanceScanner:
     def _add_finding(self, file_path: Path, line_num: int, line: str,
                      title: str, problem: str, fix: str, severity: str):
         """Add a finding to the results"""
-        self.findings.append({
-            'file': str(file_path.relative_to(self.root_dir)),
-            'line': line_num,
-            'code': line.strip(),
-            'title': title,
-            'problem': problem,
-            'fix': fix,
-            'severity': severity
-        })
+        relative_path = self._relative_paths.get(file_path)
+        if relative_path is None:
+            relative_path = self._relative_paths[file_path] = str(file_path.relative_to(self.root_dir))
+        self.findings.append(Finding(relative_path, line_num, line.strip(), title, problem, fix, severity))
 
     def _get_severity_breakdown(self) -> Dict[str, int]:
         """Get count of findings by severity"""
         breakdown = {'Critical': 0, 'High': 0, 'Medium': 0, 'Low': 0}
         for finding in self.findings:
-            breakdown[finding['severity']] += 1
+            breakdown[finding.severity] += 1
         return breakdown
 
 
+def scan_one(root_dir: str, path_str: str) -> Tuple[List, List[Finding]]:
+    """Scan a single file and return (file_stamp, findings) (runs in a worker process)"""
+    scanner = PerformanceScanner(root_dir)
+    file_path = Path(path_str)
+    with open(path_str, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size < MMAP_THRESHOLD:
+            content = f.read()
+            scanner._scan_file_content(file_path, content)
+            stamp = file_stamp(st, content)
+        else:
+            # Large files are scanned in place rather than copied into the heap
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                scanner._scan_file_content(file_path, content)
+                stamp = file_stamp(st, content)
+    return stamp, scanner.findings
+
+
+def run(root_dir: str = '.', files: Optional[List[str]] = None,
+        cache: Optional[FindingsCache] = None,
+        pool: Optional[ProcessPoolExecutor] = None) -> Dict:
+    """Scan root_dir (or the given files) and return the results dict"""
+    return PerformanceScanner(root_dir, cache, pool).scan(files)
+
+
 def main():
     """Main execution"""
     # Capture the original working directory where command was executed
     original_cwd = os.getcwd()
-    root_dir = sys.argv[1] if len(sys.argv) > 1 else "."
 
-    scanner = PerformanceScanner(root_dir)
-    results = scanner.scan()
+    parser = argparse.ArgumentParser(description='Scan a Next.js project for performance anti-patterns')
+    parser.add_argument('root_dir', nargs='?', default='.', help='Directory to scan')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rescan every file instead of reusing cached findings')
+    parser.add_argument('--files-from', metavar='PATH',
+                        help='Scan the files listed in PATH (one per line) instead of walking root_dir')
+    args = parser.parse_args()
+    root_dir = args.root_dir
+
+    cache = FindingsCache('scan-performance', original_cwd, __file__, enabled=not args.no_cache)
+    results = run(root_dir, read_file_list(args.files_from) if args.files_from else None, cache)
 
     # Print summary
     print(f"\n{'='*60}")
@@ -238,8 +425,7 @@ def main():
 
     # Save to JSON in the execution directory
     output_file = os.path.join(original_cwd, 'performance-scan-results.json')
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    save_json(results, output_file)
 
     print(f"\nDetailed results saved to: {output_file}")
 
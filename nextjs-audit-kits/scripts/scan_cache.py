@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Per-file findings cache shared by the Next.js scanners.
+
+Findings are stored per source file under .nextjs-audit-cache/<scanner>/ in
+the execution directory. An entry is valid while the file's size and mtime
+are unchanged and the scanner script itself has not been modified, so a
+re-run only scans files that changed since the last run. When only the mtime
+moved (a checkout or touch), a content hash check still reuses the entry.
+"""
+
+import os
+import json
+import hashlib
+from typing import Any, List, Optional
+
+CACHE_DIR_NAME = '.nextjs-audit-cache'
+MAX_CACHE_BYTES = 200 * 1024 * 1024  # Per scanner: evict least recently used entries past 200 MB
+
+# Returned by get() on a miss, since None is a valid cached value
+MISS = object()
+
+
+def file_digest(path: str) -> str:
+    """Return the sha1 of a file's contents"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def file_stamp(st: os.stat_result, content: Optional[bytes] = None) -> List:
+    """Return [size, mtime_ns, digest] of a file as scanned, for FindingsCache.put
+
+    st is taken before reading and digest covers the bytes actually scanned
+    (None if not all were read), so an edit during the scan misses next run.
+    """
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest() if content is not None else None
+    return [st.st_size, st.st_mtime_ns, digest]
+
+
+def content_digest(path: str) -> Optional[str]:
+    """Return a short BLAKE2b digest of a file's contents, or None if unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+
+class FindingsCache:
+    def __init__(self, scanner: str, execution_dir: str, scanner_file: str,
+                 enabled: bool = True):
+        self.cache_dir = os.path.join(execution_dir, CACHE_DIR_NAME, scanner)
+        self.enabled = enabled
+        # Any edit to the scanner script invalidates its cached findings
+        self.version = file_digest(scanner_file) if enabled else ''
+
+    def _entry_path(self, file_path: str) -> str:
+        """Return the cache entry path for a source file"""
+        digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.json')
+
+    def _key(self, file_path: str, context: str) -> Optional[List]:
+        """Build the cache key from os.stat, without reading the file"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return [os.path.abspath(file_path), st.st_size, st.st_mtime_ns, self.version, context]
+
+    def get(self, file_path: str, context: str = '') -> Any:
+        """Return cached findings for an unchanged file, or MISS"""
+        if not self.enabled:
+            return MISS
+
+        key = self._key(file_path, context)
+        entry_path = self._entry_path(file_path)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return MISS
+
+        if key is None:
+            return MISS
+
+        if entry.get('key') != key:
+            # Slow path: when only the mtime differs, compare content digests
+            old_key = entry.get('key') or []
+            if old_key[:2] != key[:2] or old_key[3:] != key[3:]:
+                return MISS
+            digest = content_digest(file_path)
+            if digest is None or digest != entry.get('digest'):
+                return MISS
+            self._write_entry(entry_path, key, digest, entry.get('findings'))
+            return entry.get('findings')
+
+        # Refresh mtime so eviction treats this entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry.get('findings')
+
+    def put(self, file_path: str, stamp: Optional[List], findings: Any, context: str = ''):
+        """Store findings for a file under the file_stamp() its worker returned
+
+        Nothing is stored without a stamp (the worker could not read the file).
+        """
+        if not self.enabled or stamp is None:
+            return
+
+        size, mtime_ns, digest = stamp
+        key = [os.path.abspath(file_path), size, mtime_ns, self.version, context]
+        self._write_entry(self._entry_path(file_path), key, digest, findings)
+
+    def _write_entry(self, entry_path: str, key: List, digest: Optional[str], findings: Any):
+        """Atomically write a cache entry"""
+        tmp_path = f'{entry_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'digest': digest, 'findings': findings}, f)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            pass
+
+    def prune(self, max_bytes: int = MAX_CACHE_BYTES):
+        """Evict this scanner's least recently used entries until they fit in max_bytes"""
+        if not self.enabled:
+            return
+
+        entries = []
+        total = 0
+        # Only this scanner's directory: scan-all runs the others concurrently
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+                total += st.st_size
+
+        if total <= max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= max_bytes:
+                break
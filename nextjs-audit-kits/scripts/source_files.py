@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Source file enumeration shared by the Next.js scanners.
+
+scan-all.py walks the project once and passes the resulting list to each
+scanner's run(), so the tree is not re-walked per scanner. A scanner run on
+its own walks the tree itself, or reads the list given with --files-from.
+"""
+
+import os
+from typing import Iterator, List
+
+SOURCE_EXTENSIONS = ('.tsx', '.ts', '.jsx', '.js')
+# Directories never scanned: pruned from the walk and filtered out of explicit file lists
+SKIP_DIRS = frozenset({'node_modules', '.next', 'out', 'dist', 'build', '.git'})
+
+
+def iter_source_files(root_dir: str) -> Iterator[str]:
+    """Yield TypeScript/JavaScript files in a single walk, pruning skipped directories"""
+    for root, dirs, files in os.walk(root_dir):
+        # Prune in place so os.walk never descends into node_modules etc.
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+
+        for file in files:
+            if file.endswith(SOURCE_EXTENSIONS):
+                yield os.path.join(root, file)
+
+
+def read_file_list(list_path: str) -> List[str]:
+    """Read a --files-from list: one path per line, blank lines ignored"""
+    with open(list_path, 'r', encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
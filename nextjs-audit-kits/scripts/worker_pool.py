@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Worker process pool shared by the Next.js scanners.
+
+The performance, security and debug scanners fan their files out to worker
+processes. Run on its own, a scanner creates a pool for its scan. scan-all.py
+creates one pool before it starts any scanner thread and passes it to every
+scanner, so workers are never forked from a multi-threaded process and all
+scanners together use cpu_count workers instead of a pool each.
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+
+def create_pool() -> ProcessPoolExecutor:
+    """Return a process pool whose workers have already started.
+
+    fork shares the already-imported scanner modules with the workers (falls
+    back to the default start method where unavailable). A fork pool starts
+    all its workers on the first submit, so that is done here, while the
+    caller is still single-threaded.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+
+    pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context)
+    pool.submit(int).result()
+    return pool
+
+
+def map_in_pool(fn: Callable[[Any], Any], items: Iterable[Any],
+                pool: Optional[ProcessPoolExecutor] = None) -> List[Any]:
+    """fn over items in worker processes, results in item order (in pool, else a pool of its own)"""
+    if pool is not None:
+        return list(pool.map(fn, items, chunksize=32))
+
+    with create_pool() as own_pool:
+        return list(own_pool.map(fn, items, chunksize=32))
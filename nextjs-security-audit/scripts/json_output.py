@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+JSON output shared by the security audit scripts.
+
+Uses orjson when it is installed (serialization in native code, one bytes
+write) and falls back to the standard library otherwise, or when orjson
+rejects the data (file names that are not valid UTF-8 reach the output as
+lone surrogates from os.fsdecode, which orjson refuses to encode).
+"""
+
+import sys
+import json
+
+try:
+    import orjson  # Optional: faster JSON output for large reports
+except ImportError:
+    orjson = None
+
+
+def print_json(data, pretty=False):
+    """Print data as JSON, compact unless pretty; uses orjson when installed"""
+    if orjson:
+        option = orjson.OPT_INDENT_2 if pretty else None
+        try:
+            encoded = orjson.dumps(data, option=option)
+        except TypeError:
+            # Values orjson rejects (such as lone surrogates): use json
+            encoded = None
+        if encoded is not None:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(encoded + b'\n')
+            sys.stdout.buffer.flush()
+            return
+    if pretty:
+        print(json.dumps(data, indent=2))
+    else:
+        print(json.dumps(data, separators=(',', ':')))
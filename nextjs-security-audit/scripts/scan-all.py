@@ -3,15 +3,24 @@
 Security Scanner Orchestrator
 Runs all security scans and aggregates results
 
-Usage: ./scripts/scan-all.py [directory] [--json] [--critical-only]
+Usage: ./scripts/scan-all.py [directory] [--json [--pretty]] [--critical-only]
 """
 
+import os
+import shutil
 import subprocess
 import sys
-import json
+import threading
+import importlib.util
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
+from json_output import print_json
+
 # Colors
 class Colors:
     RED = '\033[0;31m'
@@ -21,12 +30,76 @@ class Colors:
     BOLD = '\033[1m'
     NC = '\033[0m'
 
+    @classmethod
+    def disable(cls):
+        """Drop the escape codes (output is not a terminal)"""
+        for name in ('RED', 'YELLOW', 'GREEN', 'BLUE', 'BOLD', 'NC'):
+            setattr(cls, name, '')
+
+
+# Findings shown per scan in the text report for scans with JSON output
+MAX_LISTED_FINDINGS = 20
+
+
+def load_scanner(script_name):
+    """Import a scanner script as a module (hyphenated file names can't be imported by name)"""
+    module_name = script_name[:-len('.py')].replace('-', '_')
+    module = sys.modules.get(module_name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(module_name, Path(__file__).parent / script_name)
+        module = importlib.util.module_from_spec(spec)
+        # Register before executing so worker processes can find the module's functions
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def scan_type_safety(target_dir, pool=None):
+    """Run scan-type-safety in this process: (exit code, findings)"""
+    scanner = load_scanner('scan-type-safety.py').TypeSafetyScanner(target_dir, pool=pool)
+    scanner.scan()
+    findings = [
+        (finding['severity'], f"{finding['file']}:{finding['line']}", finding['content'][:80])
+        for items in scanner.findings.values()
+        for finding in items
+    ]
+    return (1 if scanner.threshold_exceeded() else 0), findings
+
+
+def create_fallback_pool():
+    """Process pool for scan-type-safety's no-ripgrep fallback, or None with ripgrep
+
+    With fork, a pool starts all its workers on the first submit; that is done
+    here, before any scan thread exists, so workers are never forked from a
+    multi-threaded process.
+    """
+    if shutil.which('rg'):
+        return None
+
+    # Fork: workers find scan_one in the scanner module this process imported
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork')
+    else:
+        mp_context = None
+    load_scanner('scan-type-safety.py')
+    pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=mp_context)
+    pool.submit(int).result()
+    return pool
+
+
+def scan_quick(target_dir):
+    """Run scan-quick in this process: (exit code, findings; matches are unrated)"""
+    results, total = load_scanner('scan-quick.py').scan(target_dir)
+    findings = [(None, category, line) for category, lines in results.items() for line in lines]
+    return (1 if total else 0), findings
+
 
 class SecurityScanner:
-    def __init__(self, target_dir='.', critical_only=False, json_output=False):
+    def __init__(self, target_dir='.', critical_only=False, json_output=False, pretty=False):
         self.target_dir = target_dir
         self.critical_only = critical_only
         self.json_output = json_output
+        self.pretty = pretty
         self.script_dir = Path(__file__).parent
         self.results = {}
         self.summary = {
@@ -38,75 +111,132 @@ class SecurityScanner:
             'scans_run': 0,
             'scans_failed': 0
         }
-
-    def run_scan(self, name, script_path, *args):
-        """Run a single scan script"""
+        # One timestamp for the banner and the JSON report
+        self.started = datetime.now()
+        # Scans run concurrently; guards self.results and self.summary
+        self.lock = threading.Lock()
+
+    def run_scan(self, name, script_path, scan_in_process=None, *args):
+        """Run a single scan script
+
+        Python scanners are run in this process through their scan_in_process
+        function and their findings counted by severity; shell scripts are run
+        as subprocesses and their text output searched for severity words, one
+        count per failed scan.
+        """
         print(f"{Colors.BLUE}▶ Running {name}...{Colors.NC}", file=sys.stderr)
 
         try:
-            result = subprocess.run(
-                [script_path, self.target_dir, *args],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-
-            self.results[name] = {
-                'exitcode': result.returncode,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'success': result.returncode == 0
-            }
-
-            self.summary['scans_run'] += 1
-
-            # Parse output for severity
-            if result.returncode != 0:
-                if 'CRITICAL' in result.stdout or 'Critical' in result.stdout:
-                    self.summary['critical'] += 1
-                if 'HIGH' in result.stdout or 'High' in result.stdout:
-                    self.summary['high'] += 1
-                self.summary['total_issues'] += 1
+            if scan_in_process:
+                try:
+                    exitcode, findings = scan_in_process(self.target_dir)
+                except SystemExit as e:  # The scanner gave up (e.g. ripgrep missing)
+                    exitcode, findings = e.code, None
+                stdout = stderr = ''
+            else:
+                result = subprocess.run(
+                    [script_path, self.target_dir, *args],
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+                exitcode, stdout, stderr = result.returncode, result.stdout, result.stderr
+                findings = None
+
+            with self.lock:
+                self.results[name] = {
+                    'exitcode': exitcode,
+                    'stderr': stderr,
+                    'success': exitcode == 0
+                }
+                if findings is None:
+                    self.results[name]['stdout'] = stdout
+                else:
+                    self.results[name]['findings'] = [
+                        {'severity': severity, 'location': location, 'text': text}
+                        for severity, location, text in findings
+                    ]
+
+                self.summary['scans_run'] += 1
+
+                # Parse output for severity
+                if exitcode != 0:
+                    if findings is not None:
+                        severities = Counter(severity for severity, _, _ in findings)
+                        for severity in ('critical', 'high', 'medium', 'low'):
+                            self.summary[severity] += severities[severity]
+                        self.summary['total_issues'] += len(findings)
+                    else:
+                        if 'CRITICAL' in stdout or 'Critical' in stdout:
+                            self.summary['critical'] += 1
+                        if 'HIGH' in stdout or 'High' in stdout:
+                            self.summary['high'] += 1
+                        self.summary['total_issues'] += 1
 
             return True
 
         except subprocess.TimeoutExpired:
             print(f"{Colors.RED}✗ {name} timed out{Colors.NC}", file=sys.stderr)
-            self.summary['scans_failed'] += 1
+            self.record_failure()
             return False
         except FileNotFoundError:
             print(f"{Colors.RED}✗ {name} script not found: {script_path}{Colors.NC}", file=sys.stderr)
-            self.summary['scans_failed'] += 1
+            self.record_failure()
             return False
         except Exception as e:
             print(f"{Colors.RED}✗ {name} failed: {e}{Colors.NC}", file=sys.stderr)
-            self.summary['scans_failed'] += 1
+            self.record_failure()
             return False
 
+    def record_failure(self):
+        """Count a scan that could not be run"""
+        with self.lock:
+            self.summary['scans_failed'] += 1
+
     def run_all_scans(self):
         """Execute all security scans"""
+        pool = create_fallback_pool()
+
+        # (name, script, in-process entry point for Python scanners or None)
         scans = [
-            ('Secrets Scanner', 'scan-secrets.sh'),
-            ('Server Actions', 'scan-server-actions.sh'),
-            ('Type Safety', 'scan-type-safety.py'),
-            ('Quick Heuristics', 'scan-quick.py'),
+            ('Secrets Scanner', 'scan-secrets.sh', None),
+            ('Server Actions', 'scan-server-actions.sh', None),
+            ('Type Safety', 'scan-type-safety.py', partial(scan_type_safety, pool=pool)),
+            ('Quick Heuristics', 'scan-quick.py', scan_quick),
         ]
 
         print(f"{Colors.BOLD}🔒 Security Scan Suite{Colors.NC}")
         print(f"Target: {self.target_dir}")
-        print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Time: {self.started.strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
         print()
 
-        for name, script in scans:
-            script_path = self.script_dir / script
+        # Shell scans are subprocesses and the Python scanners mostly wait on
+        # ripgrep, so threads are enough to run them side by side: wall time is
+        # the slowest scan, not the sum
+        with ThreadPoolExecutor(max_workers=len(scans)) as executor:
+            futures = []
+            for name, script, scan_in_process in scans:
+                script_path = self.script_dir / script
+
+                # Make sure shell scripts are executable (Python scanners are
+                # imported); a missing or read-only script is left to run_scan
+                if not scan_in_process and not os.access(script_path, os.X_OK):
+                    try:
+                        script_path.chmod(0o755)
+                    except OSError:
+                        pass
+
+                futures.append(executor.submit(self.run_scan, name, str(script_path), scan_in_process))
+
+            for _ in as_completed(futures):
+                print(file=sys.stderr)  # Blank line between scans
 
-            # Make sure script is executable
-            if script_path.exists():
-                script_path.chmod(0o755)
+        if pool is not None:
+            pool.shutdown()
 
-            self.run_scan(name, str(script_path))
-            print(file=sys.stderr)  # Blank line between scans
+        # Report scans in suite order, not completion order
+        self.results = {name: self.results[name] for name, _, _ in scans if name in self.results}
 
     def report(self):
         """Generate final report"""
@@ -118,12 +248,12 @@ class SecurityScanner:
     def report_json(self):
         """Output JSON report"""
         output = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self.started.isoformat(),
             'target': self.target_dir,
             'summary': self.summary,
             'scans': self.results
         }
-        print(json.dumps(output, indent=2))
+        print_json(output, self.pretty)
 
     def report_text(self):
         """Output text report"""
@@ -133,15 +263,26 @@ class SecurityScanner:
         print("=" * 60)
         print()
 
+        passed_mark = f"{Colors.GREEN}✓{Colors.NC}"
+        failed_mark = f"{Colors.RED}✗{Colors.NC}"
+
         # Show each scan result
         for name, result in self.results.items():
             if result['success']:
-                print(f"{Colors.GREEN}✓{Colors.NC} {name}: PASSED")
+                print(f"{passed_mark} {name}: PASSED")
             else:
-                print(f"{Colors.RED}✗{Colors.NC} {name}: ISSUES FOUND")
+                print(f"{failed_mark} {name}: ISSUES FOUND")
 
                 # Show output if failed
-                if result['stdout']:
+                if 'findings' in result:
+                    print()
+                    for finding in result['findings'][:MAX_LISTED_FINDINGS]:
+                        label = (finding['severity'] or 'match').upper()
+                        print(f"  [{label}] {finding['location']}: {finding['text']}")
+                    if len(result['findings']) > MAX_LISTED_FINDINGS:
+                        print(f"  ... and {len(result['findings']) - MAX_LISTED_FINDINGS} more")
+                    print()
+                elif result['stdout']:
                     print()
                     print(result['stdout'])
                     print()
@@ -186,14 +327,19 @@ def main():
     parser = argparse.ArgumentParser(description='Run comprehensive security scans')
     parser.add_argument('directory', nargs='?', default='.', help='Directory to scan (default: current)')
     parser.add_argument('--json', action='store_true', help='Output JSON format')
+    parser.add_argument('--pretty', action='store_true', help='Indent JSON output')
     parser.add_argument('--critical-only', action='store_true', help='Only run critical scans')
 
     args = parser.parse_args()
 
+    if args.json or not sys.stdout.isatty():
+        Colors.disable()
+
     scanner = SecurityScanner(
         target_dir=args.directory,
         critical_only=args.critical_only,
-        json_output=args.json
+        json_output=args.json,
+        pretty=args.pretty
     )
 
     scanner.run_all_scans()
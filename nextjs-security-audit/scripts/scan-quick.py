@@ -7,7 +7,7 @@ Purpose:
 - Helps AI Agent and developers jump to relevant files without a full deep analysis
 
 Usage:
-  ./scripts/scan-quick.py [directory] [--json]
+  ./scripts/scan-quick.py [directory] [--json [--pretty]]
 
 Exit codes:
   0 - No findings
@@ -20,14 +20,24 @@ Notes:
 
 import sys
 import os
-import json
+import re
 import subprocess
 from pathlib import Path
 
+from json_output import print_json
+
 DEFAULT_EXCLUDES = [
     'node_modules', '.next', 'dist', 'build', '.git', 'coverage'
 ]
 
+# Only source and JSON files (package.json lists next-auth, Stripe, rate limiters;
+# next.config.* is JS/TS), skipping lockfiles, docs, CSVs and public/ assets
+SOURCE_TYPES = '*.{ts,tsx,js,jsx,mjs,cjs,json}'
+
+# Longer lines are minified/bundled code: rg reports them as omitted rather
+# than printing them, so they drop out of the results
+MAX_COLUMNS = 500
+
 PATTERNS = {
     'SSRF': [
         r"fetch\(.*(req\.query|req\.body|params|searchParams|URLSearchParams)\.(get|\[)",
@@ -89,9 +99,17 @@ PATTERNS = {
     ]
 }
 
+# Each category's patterns as one Python alternation, to sort the lines of the
+# single combined ripgrep search back into categories (a line can be in several)
+CATEGORY_RES = {name: re.compile('|'.join(pats)) for name, pats in PATTERNS.items()}
+
 def run_rg(patterns, target_dir):
+    """Yield (path, line number, line) for every line matching any of patterns"""
+    # --null ends the path with NUL, so the record splits unambiguously
     args = [
-        'rg', '-n', '--no-ignore', '--hidden',
+        'rg', '-n', '--no-heading', '--null', '--no-ignore', '--hidden',
+        '--type-add', f'web:{SOURCE_TYPES}', '-t', 'web',
+        '--max-columns', str(MAX_COLUMNS),
     ]
 
     # Exclude directories
@@ -105,21 +123,34 @@ def run_rg(patterns, target_dir):
     args.append(target_dir)
 
     try:
-        out = subprocess.run(args, capture_output=True, text=True)
-        if out.returncode == 0 and out.stdout.strip():
-            return out.stdout.strip().split('\n')
-        return []
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
     except FileNotFoundError:
-        print('Error: ripgrep (rg) is required')
+        print('Error: ripgrep (rg) is required', file=sys.stderr)
         sys.exit(2)
 
+    # Consume matches as ripgrep prints them rather than buffering all of stdout
+    with proc:
+        for record in proc.stdout:
+            path, sep, rest = record.decode('utf-8', errors='replace').partition('\0')
+            if sep:
+                line_num, _, line = rest.partition(':')
+                # Drop the line ending, including the \r of CRLF as text-mode reading does
+                line = line.rstrip('\n')
+                if line.endswith('\r'):
+                    line = line[:-1]
+                yield path, line_num, line
+
 def scan(target_dir):
-    results = {}
+    # One ripgrep pass (one directory walk) for every category's patterns
+    all_patterns = [p for pats in PATTERNS.values() for p in pats]
+    results = {name: [] for name in PATTERNS}
     total = 0
-    for name, pats in PATTERNS.items():
-        lines = run_rg(pats, target_dir)
-        results[name] = lines
-        total += len(lines)
+    for path, line_num, line in run_rg(all_patterns, target_dir):
+        # "[Omitted long line with N matches]" placeholders match no category
+        for name, category_re in CATEGORY_RES.items():
+            if category_re.search(line):
+                results[name].append(f"{path}:{line_num}:{line}")
+                total += 1
     return results, total
 
 def print_text(results):
@@ -142,12 +173,13 @@ def main():
     parser = argparse.ArgumentParser(description='Next.js quick security heuristics scanner')
     parser.add_argument('directory', nargs='?', default='.', help='Directory to scan (default: current)')
     parser.add_argument('--json', action='store_true', help='Output JSON')
+    parser.add_argument('--pretty', action='store_true', help='Indent JSON output')
     args = parser.parse_args()
 
     results, total = scan(args.directory)
 
     if args.json:
-        print(json.dumps({ 'target': args.directory, 'total_matches': total, 'categories': results }, indent=2))
+        print_json({ 'target': args.directory, 'total_matches': total, 'categories': results }, args.pretty)
         sys.exit(0 if total == 0 else 1)
     else:
         exit_code = print_text(results)
@@ -3,15 +3,70 @@
 TypeScript Type Safety Scanner
 Finds 'any' types, unsafe assertions, and type ignores
 
-Usage: ./scripts/scan-type-safety.py [directory] [--json] [--threshold N]
+Usage: ./scripts/scan-type-safety.py [directory] [--json [--pretty]] [--threshold N] [--no-cache]
 """
 
+import os
 import re
 import sys
+import subprocess
+import tempfile
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from collections import defaultdict
+from operator import itemgetter
 import json
 
+from json_output import print_json
+
+# Directories never scanned
+SKIP_DIRS = ['node_modules', '.next', 'dist', 'build']
+
+# Patterns that indicate 'any' type
+ANY_TYPE_PATTERNS = [
+    r':\s*any\b',              # : any
+    r'as\s+any\b',             # as any
+    r'<any>',                  # <any>, Array<any>, Promise<any>
+    r'\bany\[\]',              # any[]
+]
+NON_NULL_ASSERTION_PATTERN = r'\w+!\s*[\.\[]'   # variable!.property or variable![index]
+
+# Compiled once; the 'any' patterns as one alternation, so a line takes one search
+ANY_TYPE_RE = re.compile('|'.join(ANY_TYPE_PATTERNS))
+NON_NULL_ASSERTION_RE = re.compile(NON_NULL_ASSERTION_PATTERN)
+FUNCTION_ANY_RE = re.compile(r'(?:function|=>\s*)\s*.*:\s*any')
+TYPE_ANY_RE = re.compile(r'(?:type|interface).*any')
+
+# Literals every match of a check contains ('any', the '!' of a non-null
+# assertion, '@ts-ignore'/'@ts-expect-error'): raw lines without any of them
+# can be skipped before they are decoded
+CHECK_LITERALS_RE = re.compile(rb'any|!|@ts-')
+
+# Every line a check can flag matches one of these. ripgrep searches for them
+# to find the candidate lines, which then go through the same per-line checks
+# as a full Python scan.
+CANDIDATE_PATTERNS = ANY_TYPE_PATTERNS + [
+    NON_NULL_ASSERTION_PATTERN,
+    '@ts-ignore',
+    '@ts-expect-error',
+]
+
+# Per-file findings from earlier runs, relative to the directory the scan is
+# run from; a file is rescanned when its modification time or size changes
+CACHE_FILE = os.path.join('.cache', 'scan-type-safety.json')
+
+# Larger files are generated or vendored bundles, not hand-written code
+MAX_FILE_SIZE = 1024 * 1024
+
+# Longer lines are minified code and are not checked (ripgrep prints an
+# "[Omitted long line ...]" placeholder for them, which matches no check)
+MAX_COLUMNS = 2000
+
+# Changed files are handed to ripgrep as arguments, this many per call
+RG_PATHS_PER_CALL = 1000
+
 # Color codes
 class Colors:
     RED = '\033[0;31m'
@@ -20,10 +75,21 @@ class Colors:
     BLUE = '\033[0;34m'
     NC = '\033[0m'
 
+    @classmethod
+    def disable(cls):
+        """Drop the escape codes (output is not a terminal)"""
+        for name in ('RED', 'YELLOW', 'GREEN', 'BLUE', 'NC'):
+            setattr(cls, name, '')
+
 class TypeSafetyScanner:
-    def __init__(self, target_dir='.', threshold=10):
+    def __init__(self, target_dir='.', threshold=10, jobs=None, use_cache=True, pool=None):
         self.target_dir = Path(target_dir)
         self.threshold = threshold
+        self.jobs = jobs or os.cpu_count() or 1
+        self.use_cache = use_cache
+        # Process pool for the no-ripgrep fallback, started by scan-all.py before
+        # its scan threads; None creates one for the scan
+        self.pool = pool
         self.findings = defaultdict(list)
         self.stats = {
             'any_types': 0,
@@ -35,125 +101,320 @@ class TypeSafetyScanner:
 
     def scan(self):
         """Scan all TypeScript files"""
-        patterns = [
-            ('*.ts', 'typescript'),
-            ('*.tsx', 'tsx'),
-        ]
-
-        for pattern, file_type in patterns:
-            for ts_file in self.target_dir.rglob(pattern):
-                # Skip node_modules, dist, etc.
-                if any(part in ts_file.parts for part in ['node_modules', '.next', 'dist', 'build']):
-                    continue
-
-                self.scan_file(ts_file)
+        files = self.list_files()
+        cache = self.load_cache()
+
+        # Reuse findings of files unchanged since the last run; scan the rest
+        results = {}
+        file_keys = {}
+        changed = []
+        for ts_file in files:
+            path = str(ts_file)
+            try:
+                st = ts_file.stat()
+            except OSError:
+                changed.append(ts_file)
+                continue
+            file_keys[path] = [st.st_mtime_ns, st.st_size]
+            entry = cache.get(path)
+            if entry and entry['key'] == file_keys[path]:
+                # Share one path string between the file's findings, as a scan does
+                for items in entry['findings'].values():
+                    for finding in items:
+                        finding['file'] = path
+                results[path] = (entry['findings'], entry['stats'])
+            else:
+                changed.append(ts_file)
+
+        if changed:
+            results.update(self.scan_changed(changed, all_files=len(changed) == len(files)))
+
+        # Merge in file order, so output does not depend on what was cached
+        for ts_file in files:
+            findings, stats = results[str(ts_file)]
+            for category, items in findings.items():
+                self.findings[category].extend(items)
+            for stat, count in stats.items():
+                self.stats[stat] += count
+
+        self.save_cache({
+            path: {'key': key, 'findings': results[path][0], 'stats': results[path][1]}
+            for path, key in file_keys.items()
+        })
+
+    def scan_changed(self, files, all_files):
+        """(findings, stats) by path for files, from ripgrep or, without it, Python"""
+        candidates = self.find_candidate_lines(None if all_files else files)
+
+        if candidates is None:
+            # ripgrep not installed: read every file and check each line in Python
+            return dict(zip(map(str, files), self.scan_files(files)))
+
+        results = {}
+        for ts_file in files:
+            path = str(ts_file)
+            scanner = TypeSafetyScanner()
+            scanner.stats['files_checked'] = 1
+            for line_num, line in candidates.get(ts_file, ()):
+                scanner.check_line(path, line_num, line)
+            results[path] = (dict(scanner.findings), scanner.stats)
+        return results
+
+    def load_cache(self):
+        """Cached entries by path, or {} when disabled, missing or unreadable"""
+        if not self.use_cache:
+            return {}
+        try:
+            with open(CACHE_FILE) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Findings depend on the checks, so an edited scanner invalidates the cache
+        if cache.get('scanner') != scanner_version():
+            return {}
+        return cache.get('files', {})
+
+    def save_cache(self, entries):
+        """Write the cache atomically (temp file + rename)"""
+        if not self.use_cache:
+            return
+        cache_dir = os.path.dirname(CACHE_FILE)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'scanner': scanner_version(), 'files': entries}, f)
+            os.replace(tmp_path, CACHE_FILE)
+        except OSError:
+            pass  # A cache that cannot be written only costs the next run time
+
+    def rg_args(self, *options):
+        """ripgrep command line over the TypeScript files under target_dir"""
+        # --no-ignore/--hidden: same file set as the rglob walk; skipped dirs are
+        # pruned by the walker rather than filtered after being descended into
+        args = ['rg', *options, '--threads', str(self.jobs),
+                '--max-filesize', str(MAX_FILE_SIZE), '--max-columns', str(MAX_COLUMNS),
+                '--no-ignore', '--hidden', '-g', '*.ts', '-g', '*.tsx']
+        for skip_dir in SKIP_DIRS:
+            args.extend(['-g', f'!{skip_dir}/'])
+        return args
+
+    def list_files(self):
+        """List TypeScript files with ripgrep's parallel walker, falling back to rglob"""
+        try:
+            result = subprocess.run(self.rg_args('--files') + [str(self.target_dir)], capture_output=True)
+        except FileNotFoundError:
+            return self.walk_files()
+
+        # ripgrep lists files in nondeterministic (parallel) order
+        return sorted(Path(os.fsdecode(line)) for line in result.stdout.splitlines())
+
+    def walk_files(self):
+        """List TypeScript files with os.scandir (used when ripgrep is not installed)"""
+        # Skipped directories are pruned before they are entered, instead of
+        # walking node_modules etc. and filtering the files found there
+        files = []
+        pending = [str(self.target_dir)]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            pending.append(entry.path)
+                    elif entry.name.endswith(('.ts', '.tsx')):
+                        files.append(Path(entry.path))
+        return sorted(files)
+
+    def find_candidate_lines(self, files=None):
+        """Lines matching CANDIDATE_PATTERNS, by file, from ripgrep (None without rg)
+
+        Searches the whole target directory, or only the given files.
+        """
+        # --null ends the path with NUL, so neither paths nor code can break the
+        # record apart; --text searches files with stray NUL bytes like any other;
+        # --with-filename keeps the path when a call gets a single file
+        args = self.rg_args('--line-number', '--with-filename', '--no-heading', '--null', '--text')
+        for pattern in CANDIDATE_PATTERNS:
+            args.extend(['-e', pattern])
+
+        if files is None:
+            path_groups = [[str(self.target_dir)]]
+        else:
+            paths = [str(f) for f in files]
+            path_groups = [paths[i:i + RG_PATHS_PER_CALL]
+                           for i in range(0, len(paths), RG_PATHS_PER_CALL)]
+
+        output = []
+        for paths in path_groups:
+            try:
+                result = subprocess.run(args + ['--'] + paths, capture_output=True)
+            except FileNotFoundError:
+                return None
+            output.append(result.stdout)
+
+        candidates = defaultdict(list)
+        for record in b''.join(output).split(b'\n'):
+            if not record:
+                continue
+            path, _, rest = record.partition(b'\0')
+            line_num, _, line = rest.partition(b':')
+            line = line.decode('utf-8', errors='replace')
+            # Drop the \r of a CRLF line ending, as text-mode reading does
+            if line.endswith('\r'):
+                line = line[:-1]
+            candidates[Path(os.fsdecode(path))].append((int(line_num), line))
+        return candidates
+
+    def scan_files(self, files):
+        """(findings, stats) for each of files, in order, from self.jobs worker processes"""
+        if self.jobs == 1 or len(files) < 2:
+            return [scan_one(str(ts_file)) for ts_file in files]
+
+        # Files are independent: each worker returns its own findings and stats
+        chunksize = max(1, len(files) // (self.jobs * 4))
+        if self.pool is not None:
+            return list(self.pool.map(scan_one, map(str, files), chunksize=chunksize))
+
+        # Fork where available: workers then also find scan_one when this script
+        # was imported as a module (scan-all.py) rather than run directly
+        if 'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        else:
+            mp_context = None
+        with ProcessPoolExecutor(max_workers=self.jobs, mp_context=mp_context) as executor:
+            return list(executor.map(scan_one, map(str, files), chunksize=chunksize))
 
     def scan_file(self, filepath):
         """Scan a single file for type safety issues"""
         try:
-            content = filepath.read_text(encoding='utf-8')
-        except (UnicodeDecodeError, PermissionError):
+            if filepath.stat().st_size > MAX_FILE_SIZE:
+                return
+            content = filepath.read_bytes()
+        except OSError:
             return
 
         self.stats['files_checked'] += 1
-        lines = content.split('\n')
-
-        for line_num, line in enumerate(lines, 1):
-            # Skip comments
-            if line.strip().startswith('//') or line.strip().startswith('*'):
-                continue
+        path = str(filepath)
+
+        # Work on raw bytes: search the whole file for a check's literal and cut
+        # out just the lines it lands on, rather than splitting every line and
+        # searching each one; only those lines are decoded
+        line_num = 1
+        line_start = 0
+        pos = 0
+        while True:
+            match = CHECK_LITERALS_RE.search(content, pos)
+            if not match:
+                break
+            start = content.rfind(b'\n', 0, match.start()) + 1
+            line_num += content.count(b'\n', line_start, start)
+            line_start = start
+            end = content.find(b'\n', match.start())
+            if end == -1:
+                end = len(content)
+            if end - start <= MAX_COLUMNS:
+                self.check_line(path, line_num, content[start:end].decode('utf-8', errors='replace'))
+            pos = end + 1
+
+    def check_line(self, path, line_num, line):
+        """Run every check on one line of the file at path (a str shared by its findings)"""
+        content = line.strip()
+
+        # Skip comments
+        if content.startswith(('//', '*')):
+            return
 
-            self.check_any_types(filepath, line_num, line)
-            self.check_non_null_assertions(filepath, line_num, line)
-            self.check_ts_ignores(filepath, line_num, line)
+        # Each check's regex only runs on lines holding its literal (a candidate
+        # line has at least one of them, often just the '!' of a comparison)
+        if 'any' in line:
+            self.check_any_types(path, line_num, line, content)
+        if '!' in line:
+            self.check_non_null_assertions(path, line_num, line, content)
+        if '@ts-' in line:
+            self.check_ts_ignores(path, line_num, line, content)
 
-    def check_any_types(self, filepath, line_num, line):
+    def check_any_types(self, filepath, line_num, line, content):
         """Check for 'any' type usage"""
-        # Patterns that indicate 'any' type
-        patterns = [
-            r':\s*any\b',              # : any
-            r'as\s+any\b',             # as any
-            r'<any>',                  # <any>
-            r'Array<any>',             # Array<any>
-            r'Promise<any>',           # Promise<any>
-            r'\bany\[\]',              # any[]
-        ]
-
-        for pattern in patterns:
-            if re.search(pattern, line):
-                # Skip false positives
-                if 'typescript-eslint' in line or 'eslint-disable' in line:
-                    continue
-
-                severity = self.get_any_severity(line)
-                self.findings['any_types'].append({
-                    'file': str(filepath),
-                    'line': line_num,
-                    'content': line.strip(),
-                    'severity': severity
-                })
-                self.stats['any_types'] += 1
-                break
+        if not ANY_TYPE_RE.search(line):
+            return
+
+        # Skip false positives
+        if 'typescript-eslint' in line or 'eslint-disable' in line:
+            return
+
+        severity = self.get_any_severity(line)
+        self.findings['any_types'].append({
+            'file': filepath,
+            'line': line_num,
+            'content': content,
+            'severity': severity
+        })
+        self.stats['any_types'] += 1
 
     def get_any_severity(self, line):
         """Determine severity of 'any' usage"""
         # Critical in function signatures
-        if re.search(r'(function|=>\s*)\s*.*:\s*any', line):
+        if FUNCTION_ANY_RE.search(line):
             return 'critical'
         # High in type definitions
-        if re.search(r'(type|interface).*any', line):
+        if TYPE_ANY_RE.search(line):
             return 'high'
         # Medium otherwise
         return 'medium'
 
-    def check_non_null_assertions(self, filepath, line_num, line):
+    def check_non_null_assertions(self, filepath, line_num, line, content):
         """Check for non-null assertions (!)"""
-        # Pattern: variable!.property or variable![index]
-        pattern = r'\w+!\s*[\.\[]'
-
-        matches = re.finditer(pattern, line)
-        for match in matches:
+        for match in NON_NULL_ASSERTION_RE.finditer(line):
             # Check if there's a null check nearby (same line or previous lines would need more context)
             # For now, just flag all non-null assertions
 
             self.findings['non_null_assertions'].append({
-                'file': str(filepath),
+                'file': filepath,
                 'line': line_num,
-                'content': line.strip(),
+                'content': content,
                 'match': match.group(0),
                 'severity': 'medium'
             })
             self.stats['non_null_assertions'] += 1
 
-    def check_ts_ignores(self, filepath, line_num, line):
+    def check_ts_ignores(self, filepath, line_num, line, content):
         """Check for @ts-ignore and @ts-expect-error"""
         if '@ts-ignore' in line:
             self.findings['ts_ignores'].append({
-                'file': str(filepath),
+                'file': filepath,
                 'line': line_num,
-                'content': line.strip(),
+                'content': content,
                 'severity': 'medium'
             })
             self.stats['ts_ignores'] += 1
 
         if '@ts-expect-error' in line:
             self.findings['ts_expect_errors'].append({
-                'file': str(filepath),
+                'file': filepath,
                 'line': line_num,
-                'content': line.strip(),
+                'content': content,
                 'severity': 'low'
             })
             self.stats['ts_expect_errors'] += 1
 
-    def report(self, json_output=False):
+    def threshold_exceeded(self):
+        """Whether 'any' usage is over the allowed threshold (the failing condition)"""
+        return self.stats['any_types'] > self.threshold
+
+    def report(self, json_output=False, pretty=False):
         """Generate report"""
         if json_output:
-            return self.report_json()
+            return self.report_json(pretty)
         else:
             return self.report_text()
 
-    def report_json(self):
-        """Generate JSON report"""
+    def report_json(self, pretty=False):
+        """Generate JSON report (exit code as for the text report)"""
+        threshold_exceeded = self.threshold_exceeded()
         output = {
             'findings': dict(self.findings),
             'stats': self.stats,
@@ -163,10 +424,11 @@ class TypeSafetyScanner:
                     self.stats['non_null_assertions'],
                     self.stats['ts_ignores'],
                 ]),
-                'threshold_exceeded': self.stats['any_types'] > self.threshold
+                'threshold_exceeded': threshold_exceeded
             }
         }
-        print(json.dumps(output, indent=2))
+        print_json(output, pretty)
+        return 1 if threshold_exceeded else 0
 
     def report_text(self):
         """Generate text report"""
@@ -177,20 +439,27 @@ class TypeSafetyScanner:
 
         total_issues = 0
 
+        # Colored severity tags, built once rather than per finding line
+        severity_tags = {
+            severity: f"{Colors.RED if severity == 'critical' else Colors.YELLOW}[{severity.upper()}]{Colors.NC}"
+            for severity in ('critical', 'high', 'medium')
+        }
+
         # Report 'any' types
         if self.findings['any_types']:
             any_count = len(self.findings['any_types'])
             print(f"{Colors.YELLOW}'any' Type Usage ({any_count} occurrences):{Colors.NC}")
-            # Group by file
-            by_file = defaultdict(list)
-            for finding in self.findings['any_types']:
-                by_file[finding['file']].append(finding)
-
-            for filepath, findings in sorted(by_file.items()):
+            # Group by file: scan() merges findings file by file, so each file's
+            # findings are already one contiguous run
+            by_file = [
+                (filepath, list(findings))
+                for filepath, findings in itertools.groupby(self.findings['any_types'], key=itemgetter('file'))
+            ]
+
+            for filepath, findings in sorted(by_file, key=itemgetter(0)):
                 print(f"\n  {filepath}")
                 for finding in findings[:3]:  # Show first 3 per file
-                    severity_color = Colors.RED if finding['severity'] == 'critical' else Colors.YELLOW
-                    print(f"    {severity_color}[{finding['severity'].upper()}]{Colors.NC} Line {finding['line']}: {finding['content'][:80]}")
+                    print(f"    {severity_tags[finding['severity']]} Line {finding['line']}: {finding['content'][:80]}")
                 if len(findings) > 3:
                     print(f"    ... and {len(findings) - 3} more")
 
@@ -232,7 +501,7 @@ class TypeSafetyScanner:
         print()
 
         # Threshold check
-        if self.stats['any_types'] > self.threshold:
+        if self.threshold_exceeded():
             print(f"{Colors.RED}⚠️  'any' type usage ({self.stats['any_types']}) exceeds threshold ({self.threshold}){Colors.NC}")
             print()
             print("Recommendations:")
@@ -253,19 +522,40 @@ class TypeSafetyScanner:
         return 0
 
 
+def scan_one(path_str):
+    """Scan a single file and return its findings and stats (runs in a worker process)"""
+    scanner = TypeSafetyScanner()
+    scanner.scan_file(Path(path_str))
+    return dict(scanner.findings), scanner.stats
+
+
+def scanner_version():
+    """Modification time and size of this script, recorded in the cache"""
+    st = os.stat(__file__)
+    return [st.st_mtime_ns, st.st_size]
+
+
 def main():
     import argparse
 
     parser = argparse.ArgumentParser(description='Scan TypeScript files for type safety issues')
     parser.add_argument('directory', nargs='?', default='.', help='Directory to scan (default: current)')
     parser.add_argument('--json', action='store_true', help='Output JSON format')
+    parser.add_argument('--pretty', action='store_true', help='Indent JSON output')
     parser.add_argument('--threshold', type=int, default=10, help='Max allowed any types (default: 10)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Parallel workers / ripgrep threads (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Rescan every file instead of reusing findings from {CACHE_FILE}')
 
     args = parser.parse_args()
 
-    scanner = TypeSafetyScanner(args.directory, args.threshold)
+    if not sys.stdout.isatty():
+        Colors.disable()
+
+    scanner = TypeSafetyScanner(args.directory, args.threshold, args.jobs, not args.no_cache)
     scanner.scan()
-    exit_code = scanner.report(args.json)
+    exit_code = scanner.report(args.json, args.pretty)
     sys.exit(exit_code)
 
 
@@ -9,35 +9,61 @@ import re
 import os
 import json
 import sys
+import bisect
 import hashlib
+import tempfile
+from collections import Counter
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from multiprocessing import Pool, cpu_count
-
-# Pattern definitions (compiled for performance)
+from typing import List, Dict, Optional, Tuple, Union
+from multiprocessing import cpu_count, get_all_start_methods, get_context
+
+try:
+    import hyperscan  # Optional: SIMD multi-pattern prefilter
+except ImportError:
+    hyperscan = None
+
+try:
+    import pcre2  # Optional: JIT-compiled regex matching
+except ImportError:
+    pcre2 = None
+
+try:
+    import re2  # Optional: multi-pattern prefilter when hyperscan is missing
+except ImportError:
+    re2 = None
+
+# Pattern definitions (compiled for performance). "anchors" are lowercase
+# literals, at least one of which is in every match of the pattern; a file
+# without any of them is not searched with that pattern. Patterns without
+# "anchors" are always run.
 PATTERNS = [
     # Cloud Provider Credentials
     {
         "name": "AWS Access Key ID",
         "pattern": re.compile(r"AKIA[0-9A-Z]{16}"),
+        "anchors": ("akia",),
         "severity": "CRITICAL",
         "context": [".env", "appsettings.json"],
     },
     {
         "name": "AWS Secret Access Key",
-        "pattern": re.compile(r"aws[_-]?secret[_-]?access[_-]?key['\"\s:=]+[A-Za-z0-9/+=]{40}", re.IGNORECASE),
+        "pattern": re.compile(r"aws[_-]?secret[_-]?access[_-]?key(?:['\":=]|[^\S\n])+[A-Za-z0-9/+=]{40}", re.IGNORECASE),
+        "anchors": ("aws",),
         "severity": "CRITICAL",
         "context": [".env", "appsettings.json"],
     },
     {
         "name": "Azure Storage Connection String",
-        "pattern": re.compile(r"DefaultEndpointsProtocol=https;AccountName=[^;]+;AccountKey=[A-Za-z0-9+/=]{88};"),
+        "pattern": re.compile(r"DefaultEndpointsProtocol=https;AccountName=[^;\n]+;AccountKey=[A-Za-z0-9+/=]{88};"),
+        "anchors": ("defaultendpointsprotocol=",),
         "severity": "CRITICAL",
         "context": ["appsettings.json", ".env", "Web.config"],
     },
     {
         "name": "Google Cloud API Key",
         "pattern": re.compile(r"AIza[0-9A-Za-z_-]{35}"),
+        "anchors": ("aiza",),
         "severity": "CRITICAL",
         "context": [".env", "next.config.js"],
     },
@@ -45,79 +71,92 @@ PATTERNS = [
     # Azure Specific Patterns
     {
         "name": "Azure SQL Database Connection String",
-        "pattern": re.compile(r"Server=tcp:[^;]+\.database\.windows\.net[^;]*;.*Password=([^;\"']+)", re.IGNORECASE),
+        "pattern": re.compile(r"Server=tcp:[^;\n]+\.database\.windows\.net[^;\n]*;.*Password=([^;\"'\n]+)", re.IGNORECASE),
+        "anchors": (".database.windows.net",),
         "severity": "CRITICAL",
         "context": ["appsettings.json", ".env", "azure-pipelines.yml"],
     },
     {
         "name": "Azure Service Principal Client Secret",
-        "pattern": re.compile(r"(?:AZURE_CLIENT_SECRET|ClientSecret)['\"\s:=]+[A-Za-z0-9~._-]{34,40}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:AZURE_CLIENT_SECRET|ClientSecret)(?:['\":=]|[^\S\n])+[A-Za-z0-9~._-]{34,40}", re.IGNORECASE),
+        "anchors": ("client_secret", "clientsecret"),
         "severity": "CRITICAL",
         "context": [".env", "appsettings.json", "azure-pipelines.yml"],
     },
     {
         "name": "Azure DevOps Personal Access Token",
-        "pattern": re.compile(r"(?:AZURE_DEVOPS_PAT|ADO_PAT|SYSTEM_ACCESSTOKEN)['\"\s:=]+[A-Za-z0-9]{52}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:AZURE_DEVOPS_PAT|ADO_PAT|SYSTEM_ACCESSTOKEN)(?:['\":=]|[^\S\n])+[A-Za-z0-9]{52}", re.IGNORECASE),
+        "anchors": ("devops_pat", "ado_pat", "system_accesstoken"),
         "severity": "CRITICAL",
         "context": [".env", "azure-pipelines.yml"],
     },
     {
         "name": "Azure Storage Account Key",
-        "pattern": re.compile(r"(?:AccountKey|AZURE_STORAGE_KEY)['\"\s:=]+[A-Za-z0-9+/=]{88}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:AccountKey|AZURE_STORAGE_KEY)(?:['\":=]|[^\S\n])+[A-Za-z0-9+/=]{88}", re.IGNORECASE),
+        "anchors": ("accountkey", "azure_storage_key"),
         "severity": "CRITICAL",
         "context": ["appsettings.json", ".env"],
     },
     {
         "name": "Azure Cosmos DB Key",
-        "pattern": re.compile(r"AccountEndpoint=https://[^;]+;AccountKey=([A-Za-z0-9+/=]{88})", re.IGNORECASE),
+        "pattern": re.compile(r"AccountEndpoint=https://[^;\n]+;AccountKey=([A-Za-z0-9+/=]{88})", re.IGNORECASE),
+        "anchors": ("accountendpoint=https://",),
         "severity": "CRITICAL",
         "context": ["appsettings.json", ".env"],
     },
     {
         "name": "Azure Service Bus Connection String",
-        "pattern": re.compile(r"Endpoint=sb://[^;]+;SharedAccessKeyName=[^;]+;SharedAccessKey=([A-Za-z0-9+/=]{43,})", re.IGNORECASE),
+        "pattern": re.compile(r"Endpoint=sb://[^;\n]+;SharedAccessKeyName=[^;\n]+;SharedAccessKey=([A-Za-z0-9+/=]{43,})", re.IGNORECASE),
+        "anchors": ("endpoint=sb://",),
         "severity": "CRITICAL",
         "context": ["appsettings.json", ".env"],
     },
     {
         "name": "Azure Event Hub Connection String",
-        "pattern": re.compile(r"Endpoint=sb://[^;]+\.servicebus\.windows\.net/;.*SharedAccessKey=([A-Za-z0-9+/=]{43,})", re.IGNORECASE),
+        "pattern": re.compile(r"Endpoint=sb://[^;\n]+\.servicebus\.windows\.net/;.*SharedAccessKey=([A-Za-z0-9+/=]{43,})", re.IGNORECASE),
+        "anchors": ("endpoint=sb://",),
         "severity": "CRITICAL",
         "context": ["appsettings.json", ".env"],
     },
     {
         "name": "Azure Redis Cache Connection String",
-        "pattern": re.compile(r"[a-z0-9-]+\.redis\.cache\.windows\.net[^,]*,password=([^,\"']+)", re.IGNORECASE),
+        "pattern": re.compile(r"[a-z0-9-]+\.redis\.cache\.windows\.net[^,\n]*,password=([^,\"'\n]+)", re.IGNORECASE),
+        "anchors": (".redis.cache.windows.net",),
         "severity": "HIGH",
         "context": ["appsettings.json", ".env"],
     },
     {
         "name": "Azure Application Insights Key",
-        "pattern": re.compile(r"(?:InstrumentationKey|APPINSIGHTS_INSTRUMENTATIONKEY)['\"\s:=]+[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:InstrumentationKey|APPINSIGHTS_INSTRUMENTATIONKEY)(?:['\":=]|[^\S\n])+[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}", re.IGNORECASE),
+        "anchors": ("instrumentationkey",),
         "severity": "MEDIUM",
         "context": ["appsettings.json", ".env"],
     },
     {
         "name": "Azure Container Registry Password",
-        "pattern": re.compile(r"(?:ACR_PASSWORD|acrPassword)['\"\s:=]+[A-Za-z0-9+/=]{43,}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:ACR_PASSWORD|acrPassword)(?:['\":=]|[^\S\n])+[A-Za-z0-9+/=]{43,}", re.IGNORECASE),
+        "anchors": ("acr_password", "acrpassword"),
         "severity": "CRITICAL",
         "context": [".env", "docker-compose.yml", "azure-pipelines.yml"],
     },
     {
         "name": "Azure Functions Host Key",
-        "pattern": re.compile(r"x-functions-key['\"\s:=]+[A-Za-z0-9_-]{52,}", re.IGNORECASE),
+        "pattern": re.compile(r"x-functions-key(?:['\":=]|[^\S\n])+[A-Za-z0-9_-]{52,}", re.IGNORECASE),
+        "anchors": ("x-functions-key",),
         "severity": "HIGH",
         "context": ["local.settings.json", ".env"],
     },
     {
         "name": "Azure App Services Publishing Password",
         "pattern": re.compile(r"<publishProfile.*userName=\"([^\"]+)\".*userPWD=\"([^\"]+)\"", re.IGNORECASE),
+        "anchors": ("<publishprofile",),
         "severity": "CRITICAL",
         "context": [".pubxml", "publish profile"],
     },
     {
         "name": "Azure Key Vault Secret (in code)",
         "pattern": re.compile(r"https://[a-z0-9-]+\.vault\.azure\.net/secrets/[^/]+/([a-f0-9]{32})", re.IGNORECASE),
+        "anchors": (".vault.azure.net/secrets/",),
         "severity": "HIGH",
         "context": ["Any file"],
         "warning": "Secret version should not be hardcoded",
@@ -126,40 +165,46 @@ PATTERNS = [
     # Docker Specific Patterns
     {
         "name": "Docker Hub Access Token",
-        "pattern": re.compile(r"(?:DOCKER_HUB_TOKEN|DOCKERHUB_TOKEN)['\"\s:=]+[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:DOCKER_HUB_TOKEN|DOCKERHUB_TOKEN)(?:['\":=]|[^\S\n])+[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}", re.IGNORECASE),
+        "anchors": ("hub_token",),
         "severity": "CRITICAL",
         "context": [".env", "docker-compose.yml", ".github/workflows"],
     },
     {
         "name": "Docker Registry Password",
-        "pattern": re.compile(r"(?:DOCKER_PASSWORD|REGISTRY_PASSWORD)['\"\s:=]+[^\s\"']{8,}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:DOCKER_PASSWORD|REGISTRY_PASSWORD)(?:['\":=]|[^\S\n])+[^\s\"']{8,}", re.IGNORECASE),
+        "anchors": ("docker_password", "registry_password"),
         "severity": "CRITICAL",
         "context": [".env", "docker-compose.yml", "Dockerfile"],
     },
     {
         "name": "Docker Compose Environment Secret",
-        "pattern": re.compile(r"environment:\s*(?:\n\s+)?(?:.*\n\s+)*?[A-Z_]+(?:PASSWORD|SECRET|KEY|TOKEN):\s*['\"]?([^'\"\s]{8,})['\"]?", re.MULTILINE),
+        "pattern": re.compile(r"environment:[^\S\n]*(?:(?:\n(?:[^\S\n].*)?)*?\n[^\S\n]+)?[A-Z_]+(?:PASSWORD|SECRET|KEY|TOKEN):[^\S\n]*['\"]?([^'\"\s]{8,})['\"]?", re.MULTILINE),
+        "anchors": ("environment:",),
         "severity": "HIGH",
         "context": ["docker-compose.yml"],
         "warning": "Use docker secrets or .env file instead",
     },
     {
         "name": "Dockerfile ARG with Secret",
-        "pattern": re.compile(r"ARG\s+(?:PASSWORD|SECRET|TOKEN|KEY|API_KEY)=([^\s]+)", re.IGNORECASE),
+        "pattern": re.compile(r"ARG[^\S\n]+(?:PASSWORD|SECRET|TOKEN|KEY|API_KEY)=([^\s]+)", re.IGNORECASE),
+        "anchors": ("arg",),
         "severity": "HIGH",
         "context": ["Dockerfile"],
         "warning": "ARG values are visible in image history",
     },
     {
         "name": "Dockerfile ENV with Secret",
-        "pattern": re.compile(r"ENV\s+(?:PASSWORD|SECRET|TOKEN|KEY|API_KEY)\s*=?\s*([^\s]+)", re.IGNORECASE),
+        "pattern": re.compile(r"ENV[^\S\n]+(?:PASSWORD|SECRET|TOKEN|KEY|API_KEY)[^\S\n]*=?[^\S\n]*([^\s]+)", re.IGNORECASE),
+        "anchors": ("env",),
         "severity": "HIGH",
         "context": ["Dockerfile"],
         "warning": "ENV values are visible in image inspection",
     },
     {
         "name": "Harbor Registry Password",
-        "pattern": re.compile(r"harbor[_-]?password['\"\s:=]+[^\s\"']{8,}", re.IGNORECASE),
+        "pattern": re.compile(r"harbor[_-]?password(?:['\":=]|[^\S\n])+[^\s\"']{8,}", re.IGNORECASE),
+        "anchors": ("harbor",),
         "severity": "CRITICAL",
         "context": [".env", "docker-compose.yml"],
     },
@@ -167,27 +212,31 @@ PATTERNS = [
     # Next.js / Vite Specific
     {
         "name": "NEXT_PUBLIC with Sensitive Data",
-        "pattern": re.compile(r"NEXT_PUBLIC_[A-Z_]*(?:API|SECRET|KEY|TOKEN)['\"\s:=]+[A-Za-z0-9+/=-]{20,}", re.IGNORECASE),
+        "pattern": re.compile(r"NEXT_PUBLIC_[A-Z_]*(?:API|SECRET|KEY|TOKEN)(?:['\":=]|[^\S\n])+[A-Za-z0-9+/=-]{20,}", re.IGNORECASE),
+        "anchors": ("next_public_",),
         "severity": "HIGH",
         "context": [".env"],
         "warning": "NEXT_PUBLIC_ vars are exposed to browser",
     },
     {
         "name": "VITE with Sensitive Data",
-        "pattern": re.compile(r"VITE_[A-Z_]*(?:API|SECRET|KEY|TOKEN)['\"\s:=]+[A-Za-z0-9+/=-]{20,}", re.IGNORECASE),
+        "pattern": re.compile(r"VITE_[A-Z_]*(?:API|SECRET|KEY|TOKEN)(?:['\":=]|[^\S\n])+[A-Za-z0-9+/=-]{20,}", re.IGNORECASE),
+        "anchors": ("vite_",),
         "severity": "HIGH",
         "context": [".env"],
         "warning": "VITE_ vars are exposed to browser",
     },
     {
         "name": "Vercel Token",
-        "pattern": re.compile(r"vercel[_-]?token['\"\s:=]+[A-Za-z0-9]{24}", re.IGNORECASE),
+        "pattern": re.compile(r"vercel[_-]?token(?:['\":=]|[^\S\n])+[A-Za-z0-9]{24}", re.IGNORECASE),
+        "anchors": ("vercel",),
         "severity": "CRITICAL",
         "context": [".vercel/", ".env"],
     },
     {
         "name": "Next.js API Secret",
-        "pattern": re.compile(r"(?:NEXTAUTH_SECRET|API_SECRET|APP_SECRET)['\"\s:=]+[A-Za-z0-9+/=-]{32,}", re.IGNORECASE),
+        "pattern": re.compile(r"(?:NEXTAUTH_SECRET|API_SECRET|APP_SECRET)(?:['\":=]|[^\S\n])+[A-Za-z0-9+/=-]{32,}", re.IGNORECASE),
+        "anchors": ("_secret",),
         "severity": "CRITICAL",
         "context": [".env.local"],
     },
@@ -195,43 +244,50 @@ PATTERNS = [
     # .NET / ABP Specific
     {
         "name": "SQL Server Connection String",
-        "pattern": re.compile(r"(?:Server|Data Source)=[^;]+;(?:Database|Initial Catalog)=[^;]+;(?:User ID|UID)=([^;]+);(?:Password|PWD)=([^;\"']+)", re.IGNORECASE),
+        "pattern": re.compile(r"(?:Server|Data Source)=[^;\n]+;(?:Database|Initial Catalog)=[^;\n]+;(?:User ID|UID)=([^;\n]+);(?:Password|PWD)=([^;\"'\n]+)", re.IGNORECASE),
+        "anchors": ("server=", "data source="),
         "severity": "CRITICAL",
         "context": ["appsettings.json", "Web.config"],
     },
     {
         "name": "Entity Framework Connection String with Password",
-        "pattern": re.compile(r'ConnectionStrings["\s:]*\{[^}]*Password=([^;"\']+)', re.IGNORECASE),
+        "pattern": re.compile(r'ConnectionStrings["\s:]*\{[^{}]*Password=([^;"\'\n]+)', re.IGNORECASE),
+        "anchors": ("connectionstrings",),
         "severity": "CRITICAL",
         "context": ["appsettings.json"],
     },
     {
         "name": "ABP License Code",
-        "pattern": re.compile(r"AbpLicenseCode['\"\s:=]+[A-Za-z0-9+/=-]{50,}", re.IGNORECASE),
+        "pattern": re.compile(r"AbpLicenseCode(?:['\":=]|[^\S\n])+[A-Za-z0-9+/=-]{50,}", re.IGNORECASE),
+        "anchors": ("abplicensecode",),
         "severity": "MEDIUM",
         "context": ["appsettings.json"],
     },
     {
         "name": "IdentityServer Client Secret",
         "pattern": re.compile(r'ClientSecrets["\s:]*\[[^\]]*Value["\s:]*["\']([A-Za-z0-9+/=-]{16,})["\']', re.IGNORECASE),
+        "anchors": ("clientsecrets",),
         "severity": "CRITICAL",
         "context": ["appsettings.json"],
     },
     {
         "name": "JWT Signing Key (.NET)",
-        "pattern": re.compile(r'(?:JwtBearer|Jwt).*["\'](?:Secret|SigningKey|IssuerSigningKey)["\']:\s*["\']([A-Za-z0-9+/=-]{32,})["\']', re.IGNORECASE),
+        "pattern": re.compile(r'(?:JwtBearer|Jwt)(?:["\']?\s*:\s*\{[^{}]*|.*)["\'](?:Secret|SigningKey|IssuerSigningKey)["\']:\s*["\']([A-Za-z0-9+/=-]{32,})["\']', re.IGNORECASE),
+        "anchors": ("jwt",),
         "severity": "CRITICAL",
         "context": ["appsettings.json"],
     },
     {
         "name": "Redis Connection with Password",
         "pattern": re.compile(r"(?:localhost|[0-9.]+|[a-z0-9.-]+):\d+,password=([^,\s\"']+)", re.IGNORECASE),
+        "anchors": (",password=",),
         "severity": "HIGH",
         "context": ["appsettings.json"],
     },
     {
         "name": "SMTP Password",
-        "pattern": re.compile(r'Smtp["\s:]*\{[^}]*["\'](?:Password|UserName)["\']:\s*["\']([^"\']{8,})["\']', re.IGNORECASE),
+        "pattern": re.compile(r'Smtp["\s:]*\{[^{}]*["\'](?:Password|UserName)["\']:\s*["\']([^"\'\n]{8,})["\']', re.IGNORECASE),
+        "anchors": ("smtp",),
         "severity": "HIGH",
         "context": ["appsettings.json"],
     },
@@ -240,73 +296,230 @@ PATTERNS = [
     {
         "name": "Private Key",
         "pattern": re.compile(r"-----BEGIN (?:RSA |EC |OPENSSH )?PRIVATE KEY-----"),
+        "anchors": ("private key-----",),
         "severity": "CRITICAL",
         "context": ["Any file"],
     },
     {
         "name": "JWT Token",
         "pattern": re.compile(r"eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+"),
+        "anchors": ("eyj",),
         "severity": "HIGH",
         "context": [".env", "config files"],
     },
     {
         "name": "Generic API Key",
-        "pattern": re.compile(r"(?:api[_-]?key|apikey|api[_-]?secret)['\"\s:=]+([A-Za-z0-9_-]{20,})", re.IGNORECASE),
+        "pattern": re.compile(r"(?:api[_-]?key|apikey|api[_-]?secret)(?:['\":=]|[^\S\n])+([A-Za-z0-9_-]{20,})", re.IGNORECASE),
+        "anchors": ("api",),
         "severity": "HIGH",
         "context": [".env", "config files"],
     },
     {
         "name": "Password Variable",
-        "pattern": re.compile(r'(?:password|passwd|pwd)["\s:=]+["\']?([^"\'\s]{8,})["\']?', re.IGNORECASE),
+        "pattern": re.compile(r'(?:password|passwd|pwd)(?:[":=]|[^\S\n])+["\']?([^"\'\s]{8,})["\']?', re.IGNORECASE),
+        "anchors": ("passw", "pwd"),
         "severity": "HIGH",
         "context": ["Any config file"],
     },
     {
         "name": "Database URL with Credentials",
         "pattern": re.compile(r"(?:postgres|mysql|mongodb(?:\+srv)?)://[a-zA-Z0-9_-]+:([^@\s]+)@"),
+        "anchors": ("postgres://", "mysql://", "mongodb://", "mongodb+srv://"),
         "severity": "CRITICAL",
         "context": [".env", "DATABASE_URL"],
     },
     {
         "name": "Bearer Token",
-        "pattern": re.compile(r"Bearer\s+[A-Za-z0-9_-]{20,}"),
+        "pattern": re.compile(r"Bearer[^\S\n]+[A-Za-z0-9_-]{20,}"),
+        "anchors": ("bearer",),
         "severity": "HIGH",
         "context": ["HTTP headers in code"],
     },
     {
         "name": "Slack Webhook",
         "pattern": re.compile(r"https://hooks\.slack\.com/services/T[A-Z0-9]{8,}/B[A-Z0-9]{8,}/[A-Za-z0-9]{24}"),
+        "anchors": ("hooks.slack.com/services/",),
         "severity": "MEDIUM",
         "context": [".env"],
     },
     {
         "name": "GitHub Token",
         "pattern": re.compile(r"(?:ghp|gho|ghu|ghs|ghr)_[A-Za-z0-9]{36,}"),
+        "anchors": ("ghp_", "gho_", "ghu_", "ghs_", "ghr_"),
         "severity": "CRITICAL",
         "context": [".env", "CI/CD configs"],
     },
     {
         "name": "Stripe API Key",
         "pattern": re.compile(r"(?:sk|pk)_(?:live|test)_[0-9a-zA-Z]{24,}"),
+        "anchors": ("_live_", "_test_"),
         "severity": "CRITICAL",
         "context": [".env"],
     },
     {
         "name": "SendGrid API Key",
         "pattern": re.compile(r"SG\.[a-zA-Z0-9_-]{22}\.[a-zA-Z0-9_-]{43}"),
+        "anchors": ("sg.",),
         "severity": "HIGH",
         "context": [".env", "appsettings.json"],
     },
     {
         "name": "NPM Auth Token",
         "pattern": re.compile(r"//registry\.npmjs\.org/:_authToken=([A-Za-z0-9-_]+)"),
+        "anchors": ("registry.npmjs.org/:_authtoken=",),
         "severity": "CRITICAL",
         "context": [".npmrc"],
     },
 ]
 
+
+
+def compile_pattern_database():
+    """Compile PATTERNS into one Hyperscan database (None when hyperscan is missing)"""
+    if hyperscan is None:
+        return None
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[p["pattern"].pattern.encode() for p in PATTERNS],
+        ids=list(range(len(PATTERNS))),
+        elements=len(PATTERNS),
+        # One report per pattern is enough to know the pattern occurs in the file
+        flags=[
+            hyperscan.HS_FLAG_SINGLEMATCH
+            | (hyperscan.HS_FLAG_CASELESS if p["pattern"].flags & re.IGNORECASE else 0)
+            for p in PATTERNS
+        ],
+    )
+    return database
+
+
+PATTERN_DATABASE = compile_pattern_database()
+
+
+def compile_pattern_set():
+    """Compile PATTERNS into one RE2 set (None when hyperscan is used or re2 is missing)"""
+    if PATTERN_DATABASE is not None or re2 is None:
+        return None
+    pattern_set = re2.Set.SearchSet(re2.Options())
+    try:
+        for p in PATTERNS:
+            flags = "".join(
+                flag for flag, re_flag in (("i", re.IGNORECASE), ("m", re.MULTILINE))
+                if p["pattern"].flags & re_flag
+            )
+            pattern_set.Add(f"(?{flags}){p['pattern'].pattern}" if flags else p["pattern"].pattern)
+        pattern_set.Compile()
+    except re2.error:
+        # Syntax RE2 does not accept: fall back to the anchors
+        return None
+    return pattern_set
+
+
+PATTERN_SET = compile_pattern_set()
+
+# Hyperscan's and RE2's \s leave out characters Python's \s matches in ASCII
+# text (\x1c-\x1f, and \v for RE2); they become spaces for the prefilter,
+# which can only add matches
+PREFILTER_SPACES = bytes.maketrans(b"\x0b\x1c\x1d\x1e\x1f", b"     ")
+
+# re flags carried over to pcre2 (the binding uses PCRE2's own flag values)
+PCRE2_FLAGS = ("IGNORECASE", "MULTILINE", "DOTALL", "VERBOSE", "ASCII")
+
+
+def jit_compile(pattern: "re.Pattern"):
+    """pattern JIT-compiled with pcre2 when installed, else pattern itself"""
+    if pcre2 is None:
+        return pattern
+    flags = 0
+    for name in PCRE2_FLAGS:
+        if pattern.flags & getattr(re, name):
+            flags |= getattr(pcre2, name)
+    try:
+        return pcre2.compile(pattern.pattern, flags, jit=True)
+    except Exception:
+        # Syntax PCRE2 does not accept: keep using re for this pattern
+        return pattern
+
+
+# Matcher for each pattern: its pcre2 JIT version, or the re pattern
+PATTERN_MATCHERS = {p["pattern"]: jit_compile(p["pattern"]) for p in PATTERNS}
+
+
+def bytes_pattern(pattern: "re.Pattern") -> Optional["re.Pattern"]:
+    """pattern compiled for bytes (None if its source is not valid as bytes)"""
+    try:
+        return re.compile(pattern.pattern.encode(), pattern.flags & ~re.UNICODE)
+    except (re.error, UnicodeError):
+        return None
+
+
+# Bytes matcher for each pattern, to search ASCII files without decoding them.
+# On ASCII input a bytes pattern matches exactly where the str pattern does,
+# except that str \s also matches \x1c-\x1f: files with those are decoded.
+BYTES_MATCHERS = {
+    p["pattern"]: jit_compile(compiled) if compiled is not None else None
+    for p in PATTERNS
+    for compiled in [bytes_pattern(p["pattern"])]
+}
+STR_ONLY_SPACE_RE = re.compile(rb"[\x1c-\x1f]")
+
+# Anchors as bytes, to test the raw (or re-encoded) file content
+PATTERN_ANCHORS = [
+    tuple(anchor.encode() for anchor in p["anchors"]) if "anchors" in p else None
+    for p in PATTERNS
+]
+
+# The non-ASCII letters that IGNORECASE matches to an ASCII letter, replaced
+# by it before lowercasing (bytes.lower() only folds ASCII letters)
+ANCHOR_CASE_FOLDS = (
+    ("\u0130", "i"),  # LATIN CAPITAL LETTER I WITH DOT ABOVE
+    ("\u0131", "i"),  # LATIN SMALL LETTER DOTLESS I
+    ("\u017f", "s"),  # LATIN SMALL LETTER LONG S
+    ("\u212a", "k"),  # KELVIN SIGN
+)
+
+
+def on_pattern_match(pattern_id: int, start: int, end: int, flags: int, found: set):
+    """Hyperscan match callback: record which pattern matched"""
+    found.add(pattern_id)
+
+
+def patterns_to_run(content: Union[bytes, str]) -> List[Dict]:
+    """PATTERNS that can match somewhere in content, in PATTERNS order.
+
+    content is the raw bytes of an ASCII file or the decoded text of any other.
+    For bytes with Hyperscan (or else an RE2 set), all patterns are checked in
+    one pass; otherwise a pattern is kept when one of its anchors is in the
+    lowercased content.
+    Python's str matching also folds a few non-ASCII letters to ASCII ones
+    (e.g. the Kelvin sign matches "k"), so decoded text has those mapped to
+    their ASCII letter before the anchors are looked up. The regexes then only
+    run for the kept patterns. With PCRE2, running every JIT-compiled pattern
+    over decoded text is cheaper than the anchor lookups, so all are kept.
+    """
+    if isinstance(content, str):
+        if pcre2 is not None:
+            return PATTERNS
+        for letter, ascii_letter in ANCHOR_CASE_FOLDS:
+            content = content.replace(letter, ascii_letter)
+        lowered = content.encode().lower()
+    elif PATTERN_DATABASE is not None:
+        found = set()
+        PATTERN_DATABASE.scan(content.translate(PREFILTER_SPACES), match_event_handler=on_pattern_match, context=found)
+        return [PATTERNS[pattern_id] for pattern_id in sorted(found)]
+    elif PATTERN_SET is not None:
+        found = PATTERN_SET.Match(content.translate(PREFILTER_SPACES)) or ()
+        return [PATTERNS[pattern_id] for pattern_id in sorted(found)]
+    else:
+        lowered = content.lower()
+    return [
+        pattern_def for pattern_def, anchors in zip(PATTERNS, PATTERN_ANCHORS)
+        if anchors is None or any(anchor in lowered for anchor in anchors)
+    ]
+
+
 # NOTE: This list is for DOCUMENTATION ONLY - the scanner actually scans ALL files recursively.
-# The scanner uses os.walk() to find all files, then filters by binary detection and SKIP_DIRS.
+# The scanner walks all files with os.scandir(), then filters by binary detection and SKIP_DIRS.
 # This means it automatically handles ALL variations:
 #   - azure-pipelines.yml, azure-pipeline.yaml, azure_pipelines.yml
 #   - docker-compose.yml, docker-compose.yaml, docker_compose.yml
@@ -341,6 +554,10 @@ SKIP_DIRS = {
     ".vercel", ".nuxt", ".cache", "coverage",
 }
 
+# Findings cache, relative to the scanned directory (inside a SKIP_DIRS entry,
+# so the cached secrets are not scanned themselves)
+CACHE_FILE = Path(".cache") / "secret-scan.json"
+
 # File extensions to skip (binary files)
 SKIP_EXTENSIONS = {
     ".exe", ".dll", ".so", ".dylib", ".bin", ".dat",
@@ -350,129 +567,292 @@ SKIP_EXTENSIONS = {
 }
 
 
-def is_binary_file(file_path: Path) -> bool:
-    """Check if file is binary by reading first 8192 bytes."""
+def walk_files(directory: str) -> List[str]:
+    """Paths of the files under directory to scan, in os.walk order.
+
+    os.scandir gives each entry's type without a stat call; SKIP_DIRS are
+    pruned and SKIP_EXTENSIONS dropped here. Paths are joined onto directory,
+    with "" standing for the current directory.
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(directory or '.') as entries:
+            for entry in entries:
+                path = os.path.join(directory, entry.name)
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # Symlinked directories are not followed, as in os.walk
+                    if entry.name not in SKIP_DIRS and not entry.is_symlink():
+                        subdirs.append(path)
+                elif os.path.splitext(entry.name)[1] not in SKIP_EXTENSIONS:
+                    files.append(path)
+    except OSError:
+        return files
+
+    for subdir in subdirs:
+        files.extend(walk_files(subdir))
+    return files
+
+
+# Bytes that occur in text: printable ASCII, the usual whitespace and control
+# characters (BEL, BS, TAB, LF, FF, CR, ESC) and every byte >= 0x80
+TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+def read_file(file_path: str) -> Optional[bytes]:
+    """Content of a file to scan, with universal newlines (None to skip the file)."""
     try:
         with open(file_path, 'rb') as f:
-            chunk = f.read(8192)
-            if b'\0' in chunk:
-                return True
-        return False
+            # Skip files larger than 10MB (likely binary or generated)
+            if os.fstat(f.fileno()).st_size > 10 * 1024 * 1024:
+                return None
+
+            # Skip binary files: NUL in the first 8192 bytes, or more than 30%
+            # of them control characters (counted in one C call by deleting
+            # the text bytes)
+            content = f.read(8192)
+            if b'\0' in content or len(content.translate(None, TEXT_BYTES)) * 10 > len(content) * 3:
+                return None
+            content += f.read()
     except Exception:
-        return True
-
-
-def should_scan_file(file_path: Path) -> bool:
-    """Determine if file should be scanned."""
-    # Check if any parent directory is in skip list
-    for parent in file_path.parents:
-        if parent.name in SKIP_DIRS:
-            return False
+        # Silently skip files that can't be read
+        return None
 
-    # Skip binary extensions
-    if file_path.suffix in SKIP_EXTENSIONS:
-        return False
+    # Universal newlines, as reading the file in text mode does; before
+    # the prefilter, so it sees the same line breaks as the regexes
+    if b'\r' in content:
+        content = content.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return content
 
-    # Skip if binary
-    if is_binary_file(file_path):
-        return False
 
-    # Skip files larger than 10MB (likely binary or generated)
-    try:
-        if file_path.stat().st_size > 10 * 1024 * 1024:
-            return False
-    except Exception:
-        return False
+def scan_file_cached(job: Tuple[str, Optional[str]]) -> Tuple[Optional[str], Optional[List[Dict]]]:
+    """Scan a file unless its content is unchanged since it was cached.
 
-    return True
+    job is (path, cached content digest or None). Returns (digest, findings),
+    with findings None when the digest matches and the cached ones still apply.
+    """
+    file_path, cached_digest = job
+    content = read_file(file_path)
+    if content is None:
+        return None, []
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    if digest == cached_digest:
+        return digest, None
+    return digest, scan_content(file_path, content)
 
 
-def scan_file(file_path: Path) -> List[Dict]:
-    """Scan a single file for secrets."""
+def scan_content(file_path: str, content: bytes) -> List[Dict]:
+    """Scan the content of a file (as returned by read_file) for secrets."""
     findings = []
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-
-        for line_num, line in enumerate(lines, start=1):
-            for pattern_def in PATTERNS:
-                matches = pattern_def["pattern"].finditer(line)
-                for match in matches:
-                    # Extract matched value
-                    matched_value = match.group(0)
-                    if match.groups():
-                        matched_value = match.group(1) if len(match.groups()) >= 1 else matched_value
-
-                    finding = {
-                        "file": str(file_path),
-                        "line": line_num,
-                        "pattern_name": pattern_def["name"],
-                        "severity": pattern_def["severity"],
-                        "matched_value": matched_value[:100],  # Limit to 100 chars
-                        "line_content": line.strip()[:200],  # Context
-                        "warning": pattern_def.get("warning", ""),
-                    }
-                    findings.append(finding)
+        is_ascii = content.isascii()
+        text = content if is_ascii else content.decode('utf-8', errors='ignore')
+        patterns = patterns_to_run(text)
+        if not patterns:
+            return findings
+
+        # ASCII content is searched as it was read; anything else is decoded
+        matchers = [BYTES_MATCHERS.get(p["pattern"]) for p in patterns]
+        str_only_space = STR_ONLY_SPACE_RE.search(content)
+        if is_ascii and all(matchers) and not str_only_space:
+            newline = b'\n'
+        else:
+            if is_ascii:
+                text = content.decode('ascii')
+            newline = '\n'
+            if str_only_space:
+                # PCRE2's \s leaves out \x1c-\x1f as well: only re matches them
+                matchers = [p["pattern"] for p in patterns]
+            else:
+                matchers = [PATTERN_MATCHERS.get(p["pattern"], p["pattern"]) for p in patterns]
+
+        # Each pattern searches the whole text in one call; newline offsets
+        # for line numbers are only collected once there is a match
+        newlines = None
+        line_contents = {}
+
+        # Fields shared by every finding of a pattern, looked up once per
+        # pattern instead of once per match
+        path = str(file_path)
+
+        for pattern_def, matcher in zip(patterns, matchers):
+            name = pattern_def["name"]
+            severity = pattern_def["severity"]
+            warning = pattern_def.get("warning", "")
+            # The value is the first group, or the whole match without groups
+            value_group = 1 if pattern_def["pattern"].groups else 0
+            matches = matcher.finditer(text)
+            for match in matches:
+                # Extract matched value
+                matched_value = match.group(value_group)
+                value_start = match.start(value_group)
+
+                # Report the line holding the value (a match can span lines)
+                if newlines is None:
+                    newlines = [m.start() for m in re.finditer(newline, text)]
+                line_index = bisect.bisect_left(newlines, value_start)
+                # A line's context is sliced once, however many findings it has
+                line_content = line_contents.get(line_index)
+                if line_content is None:
+                    line_start = newlines[line_index - 1] + 1 if line_index else 0
+                    line_end = newlines[line_index] if line_index < len(newlines) else len(text)
+                    line_content = text[line_start:line_end].strip()[:200]
+                    if newline == b'\n':
+                        line_content = line_content.decode('ascii')
+                    line_contents[line_index] = line_content
+                if newline == b'\n':
+                    matched_value = matched_value.decode('ascii')
+
+                finding = {
+                    "file": path,
+                    "line": line_index + 1,
+                    "pattern_name": name,
+                    "severity": severity,
+                    "matched_value": matched_value[:100],  # Limit to 100 chars
+                    "line_content": line_content,  # Context
+                    "warning": warning,
+                }
+                findings.append(finding)
+
+        # By line, then in pattern order (the sort is stable)
+        findings.sort(key=lambda finding: finding["line"])
 
     except Exception as e:
-        # Silently skip files that can't be read
+        # Silently skip files that can't be scanned
         pass
 
     return findings
 
 
-def scan_directory_worker(file_path: Path) -> List[Dict]:
-    """Worker function for parallel scanning."""
-    if should_scan_file(file_path):
-        return scan_file(file_path)
-    return []
+def scanner_version() -> List[int]:
+    """Modification time and size of this script, recorded in the cache"""
+    st = os.stat(__file__)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_cache(cache_file: Optional[Path]) -> Dict:
+    """Cached entries by path, or {} when disabled, missing or unreadable"""
+    if cache_file is None:
+        return {}
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Findings depend on PATTERNS and the scan code, so an edited scanner
+    # invalidates the cache
+    if cache.get("scanner") != scanner_version():
+        return {}
+    return cache.get("files", {})
+
+
+def save_cache(cache_file: Optional[Path], entries: Dict):
+    """Write the cache atomically (temp file + rename)"""
+    if cache_file is None:
+        return
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"scanner": scanner_version(), "files": entries}, f)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        pass  # A cache that cannot be written only costs the next run time
+
+
+# Files scanned in the worker pool as tasks of their own
+LARGE_FILE_SIZE = 1024 * 1024
+
 
+def scan_directory(directory: Path, use_multiprocessing: bool = True,
+                   cache_file: Optional[Path] = None) -> List[Dict]:
+    """Scan directory recursively for secrets.
 
-def scan_directory(directory: Path, use_multiprocessing: bool = True) -> List[Dict]:
-    """Scan directory recursively for secrets."""
+    With cache_file, findings of files whose size and modification time (or,
+    failing that, content digest) are unchanged since the last run are reused.
+    """
     all_findings = []
 
     # Collect all files to scan
-    files_to_scan = []
-    for root, dirs, files in os.walk(directory):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-
-        for file_name in files:
-            file_path = Path(root) / file_name
-            files_to_scan.append(file_path)
+    top = str(directory)
+    files_to_scan = walk_files('' if top == '.' else top)
 
     print(f"📁 Found {len(files_to_scan)} files to check...", file=sys.stderr)
 
-    if use_multiprocessing and len(files_to_scan) > 10:
+    # Reuse findings of files unchanged since the last run; scan the rest
+    cache = load_cache(cache_file)
+    results = {}
+    entries = {}
+    keys = {}
+    jobs = []
+    for file_path in files_to_scan:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            jobs.append((file_path, None))
+            continue
+        key = [st.st_size, st.st_mtime_ns]
+        entry = cache.get(file_path)
+        if entry and entry["key"] == key:
+            results[file_path] = entries[file_path] = entry
+        else:
+            jobs.append((file_path, entry["digest"] if entry else None))
+            keys[file_path] = key
+
+    def record(file_path: str, digest: Optional[str], findings: Optional[List[Dict]]):
+        if findings is None:
+            # Content unchanged (e.g. a fresh checkout): cached findings apply
+            findings = cache[file_path]["findings"]
+        results[file_path] = {"key": keys.get(file_path), "digest": digest, "findings": findings}
+        # Skipped files (binary, too large, unreadable) have no digest and are not cached
+        if digest is not None and file_path in keys:
+            entries[file_path] = results[file_path]
+
+    if use_multiprocessing and len(jobs) > 10:
         # Use multiprocessing for large scans
         num_processes = max(1, cpu_count() - 1)
-        with Pool(num_processes) as pool:
-            results = pool.map(scan_directory_worker, files_to_scan)
-
-        for findings in results:
-            all_findings.extend(findings)
+        # Paths go to the workers in batches, and each batch's findings are
+        # collected as it completes (in file order) rather than all at the end
+        chunksize = max(1, len(jobs) // (num_processes * 8))
+        # Fork where available: workers inherit the compiled patterns, hyperscan
+        # database and pcre2 matchers instead of importing and compiling them again
+        mp_context = get_context('fork' if 'fork' in get_all_start_methods() else None)
+        # Large files are queued first and one per task, so none of them ends
+        # up at the back of a batch and keeps one worker busy after the rest
+        large_jobs = [job for job in jobs if keys.get(job[0], (0,))[0] > LARGE_FILE_SIZE]
+        other_jobs = [job for job in jobs if keys.get(job[0], (0,))[0] <= LARGE_FILE_SIZE]
+        with mp_context.Pool(num_processes) as pool:
+            batches = [
+                (large_jobs, pool.imap(scan_file_cached, large_jobs)),
+                (other_jobs, pool.imap(scan_file_cached, other_jobs, chunksize)),
+            ]
+            for batch_jobs, batch_results in batches:
+                for (file_path, _), (digest, findings) in zip(batch_jobs, batch_results):
+                    record(file_path, digest, findings)
     else:
         # Single-threaded for small scans
-        for file_path in files_to_scan:
-            findings = scan_directory_worker(file_path)
-            all_findings.extend(findings)
+        for job in jobs:
+            record(job[0], *scan_file_cached(job))
+
+    # Merge in file order, so output does not depend on what was cached
+    for file_path in files_to_scan:
+        all_findings.extend(results[file_path]["findings"])
 
+    save_cache(cache_file, entries)
     return all_findings
 
 
 def generate_summary(findings: List[Dict]) -> Dict:
     """Generate summary statistics."""
     severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0, "INFO": 0}
-    pattern_counts = {}
-
-    for finding in findings:
-        severity = finding["severity"]
-        severity_counts[severity] = severity_counts.get(severity, 0) + 1
-
-        pattern = finding["pattern_name"]
-        pattern_counts[pattern] = pattern_counts.get(pattern, 0) + 1
+    # Counter counts in C; keys stay in first-seen order, as the JSON shows them
+    severity_counts.update(Counter(map(itemgetter("severity"), findings)))
+    pattern_counts = dict(Counter(map(itemgetter("pattern_name"), findings)))
 
     return {
         "total_findings": len(findings),
@@ -481,10 +861,32 @@ def generate_summary(findings: List[Dict]) -> Dict:
     }
 
 
+def write_results(output_file: Path, output: Dict):
+    """Write output as indented JSON, with each finding on one line.
+
+    json.dump with indent runs the pure-Python encoder over every finding;
+    here each finding is encoded by the C encoder and written as it is
+    encoded, so the document is never built in memory as a whole.
+    """
+    envelope = json.dumps({key: value for key, value in output.items() if key != "findings"}, indent=2)
+    with open(output_file, 'w') as f:
+        # The envelope without its closing "\n}", then the findings array
+        f.write(envelope[:-2])
+        f.write(',\n  "findings": [')
+        separator = '\n    '
+        for finding in output["findings"]:
+            f.write(separator)
+            f.write(json.dumps(finding))
+            separator = ',\n    '
+        f.write('\n  ]\n}' if output["findings"] else ']\n}')
+
+
 def main():
     """Main scanner function."""
-    # Determine scan directory
-    scan_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd()
+    # Determine scan directory; --no-cache rescans every file
+    args = [arg for arg in sys.argv[1:] if arg != "--no-cache"]
+    use_cache = len(args) == len(sys.argv) - 1
+    scan_dir = Path(args[0]) if args else Path.cwd()
 
     if not scan_dir.exists():
         print(f"❌ Error: Directory {scan_dir} does not exist", file=sys.stderr)
@@ -494,7 +896,7 @@ def main():
     print(f"📊 Using {len(PATTERNS)} detection patterns", file=sys.stderr)
 
     # Scan directory
-    findings = scan_directory(scan_dir)
+    findings = scan_directory(scan_dir, cache_file=scan_dir / CACHE_FILE if use_cache else None)
 
     # Generate summary
     summary = generate_summary(findings)
@@ -508,8 +910,7 @@ def main():
 
     # Write to file
     output_file = scan_dir / "secret-scan-results.json"
-    with open(output_file, 'w') as f:
-        json.dump(output, f, indent=2)
+    write_results(output_file, output)
 
     # Print summary to stderr
     print(f"\n✅ Scan complete!", file=sys.stderr)
@@ -8,9 +8,11 @@ Checks environment files and configuration files across all commits.
 import re
 import sys
 import json
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
+from multiprocessing import cpu_count, get_all_start_methods, get_context
 
 try:
     import git
@@ -19,6 +21,21 @@ except ImportError:
     print("Install with: pip install gitpython", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import orjson  # Optional: much faster JSON for large results
+except ImportError:
+    orjson = None
+
+try:
+    import hyperscan  # Optional: SIMD multi-pattern prefilter
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2  # Optional: multi-pattern prefilter when hyperscan is missing
+except ImportError:
+    re2 = None
+
 # Sensitive file patterns to check in history
 SENSITIVE_FILE_PATTERNS = [
     # Environment files
@@ -75,38 +92,47 @@ SENSITIVE_FILE_PATTERNS = [
     r"\.vercel/.*\.json$",
     r"\.netlify/.*\.json$",
 ]
+SENSITIVE_FILE_RE = re.compile("|".join(SENSITIVE_FILE_PATTERNS), re.IGNORECASE)
 
-# Secret patterns (same as scan_files.py but simplified)
+# Secret patterns (same as scan_files.py but simplified). "anchors" are
+# lowercase literals, at least one of which is in every match of the pattern;
+# content without any of them is not searched with that pattern.
 SECRET_PATTERNS = [
     # Cloud Providers
     {
         "name": "AWS Access Key",
         "pattern": re.compile(r"AKIA[0-9A-Z]{16}"),
+        "anchors": ("akia",),
         "severity": "CRITICAL",
     },
     {
         "name": "Azure Storage Connection String",
         "pattern": re.compile(r"DefaultEndpointsProtocol=https;AccountName=[^;]+;AccountKey=[A-Za-z0-9+/=]{88};"),
+        "anchors": ("defaultendpointsprotocol=https;",),
         "severity": "CRITICAL",
     },
     {
         "name": "Azure SQL Connection String",
         "pattern": re.compile(r"Server=tcp:[^;]+\.database\.windows\.net[^;]*;.*Password=([^;\"']+)", re.IGNORECASE),
+        "anchors": ("server=tcp:",),
         "severity": "CRITICAL",
     },
     {
         "name": "Azure Service Principal Secret",
         "pattern": re.compile(r"(?:AZURE_CLIENT_SECRET|ClientSecret)['\"\s:=]+[A-Za-z0-9~._-]{34,40}", re.IGNORECASE),
+        "anchors": ("azure_client_secret", "clientsecret"),
         "severity": "CRITICAL",
     },
     {
         "name": "Azure DevOps PAT",
         "pattern": re.compile(r"(?:AZURE_DEVOPS_PAT|ADO_PAT)['\"\s:=]+[A-Za-z0-9]{52}", re.IGNORECASE),
+        "anchors": ("azure_devops_pat", "ado_pat"),
         "severity": "CRITICAL",
     },
     {
         "name": "Azure Container Registry Password",
         "pattern": re.compile(r"(?:ACR_PASSWORD|acrPassword)['\"\s:=]+[A-Za-z0-9+/=]{43,}", re.IGNORECASE),
+        "anchors": ("acr_password", "acrpassword"),
         "severity": "CRITICAL",
     },
 
@@ -114,11 +140,13 @@ SECRET_PATTERNS = [
     {
         "name": "Docker Hub Token",
         "pattern": re.compile(r"(?:DOCKER_HUB_TOKEN|DOCKERHUB_TOKEN)['\"\s:=]+[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}", re.IGNORECASE),
+        "anchors": ("docker_hub_token", "dockerhub_token"),
         "severity": "CRITICAL",
     },
     {
         "name": "Docker Registry Password",
         "pattern": re.compile(r"(?:DOCKER_PASSWORD|REGISTRY_PASSWORD)['\"\s:=]+[^\s\"']{8,}", re.IGNORECASE),
+        "anchors": ("docker_password", "registry_password"),
         "severity": "CRITICAL",
     },
 
@@ -126,61 +154,160 @@ SECRET_PATTERNS = [
     {
         "name": "Private Key",
         "pattern": re.compile(r"-----BEGIN (?:RSA |EC |OPENSSH )?PRIVATE KEY-----"),
+        "anchors": ("private key-----",),
         "severity": "CRITICAL",
     },
     {
         "name": "Generic API Key",
         "pattern": re.compile(r"(?:api[_-]?key|apikey)['\"\s:=]+([A-Za-z0-9_-]{20,})", re.IGNORECASE),
+        "anchors": ("api_key", "api-key", "apikey"),
         "severity": "HIGH",
     },
     {
         "name": "Database URL with Password",
         "pattern": re.compile(r"(?:postgres|mysql|mongodb)://[a-zA-Z0-9_-]+:([^@\s]+)@"),
+        "anchors": ("postgres://", "mysql://", "mongodb://"),
         "severity": "CRITICAL",
     },
     {
         "name": "JWT Token",
-        "pattern": re.compile(r"eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+"),
+        # The header is bounded: every "eyJ" in a long run without a dot would
+        # otherwise scan to the end of the run (quadratic on minified lines)
+        "pattern": re.compile(r"eyJ[a-zA-Z0-9_-]{1,512}\.eyJ[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+"),
+        "anchors": ("eyj",),
         "severity": "HIGH",
     },
     {
         "name": "GitHub Token",
         "pattern": re.compile(r"(?:ghp|gho|ghu|ghs|ghr)_[A-Za-z0-9]{36,}"),
+        "anchors": ("ghp_", "gho_", "ghu_", "ghs_", "ghr_"),
         "severity": "CRITICAL",
     },
     {
         "name": "Stripe API Key",
         "pattern": re.compile(r"(?:sk|pk)_(?:live|test)_[0-9a-zA-Z]{24,}"),
+        "anchors": ("_live_", "_test_"),
         "severity": "CRITICAL",
     },
     {
         "name": "SQL Server Connection String",
         "pattern": re.compile(r"(?:Server|Data Source)=[^;]+;.*Password=([^;\"']+)", re.IGNORECASE),
+        "anchors": ("server=", "data source="),
         "severity": "CRITICAL",
     },
     {
         "name": "Password Variable",
         "pattern": re.compile(r'(?:password|passwd|pwd)["\s:=]+["\']?([^"\'\s]{8,})["\']?', re.IGNORECASE),
+        "anchors": ("passw", "pwd"),
         "severity": "HIGH",
     },
 ]
 
 
+def compile_pattern_database():
+    """Compile SECRET_PATTERNS into one Hyperscan database (None when hyperscan is missing)"""
+    if hyperscan is None:
+        return None
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[p["pattern"].pattern.encode() for p in SECRET_PATTERNS],
+        ids=list(range(len(SECRET_PATTERNS))),
+        elements=len(SECRET_PATTERNS),
+        # One report per pattern is enough to know the pattern occurs in the blob
+        flags=[
+            hyperscan.HS_FLAG_SINGLEMATCH
+            | (hyperscan.HS_FLAG_CASELESS if p["pattern"].flags & re.IGNORECASE else 0)
+            for p in SECRET_PATTERNS
+        ],
+    )
+    return database
+
+
+PATTERN_DATABASE = compile_pattern_database()
+
+
+def compile_pattern_set():
+    """Compile SECRET_PATTERNS into one RE2 set (None when hyperscan is used or re2 is missing)"""
+    if PATTERN_DATABASE is not None or re2 is None:
+        return None
+    pattern_set = re2.Set.SearchSet(re2.Options())
+    try:
+        for p in SECRET_PATTERNS:
+            expression = p["pattern"].pattern
+            pattern_set.Add(f"(?i){expression}" if p["pattern"].flags & re.IGNORECASE else expression)
+        pattern_set.Compile()
+    except re2.error:
+        # Syntax RE2 does not accept: fall back to the anchors
+        return None
+    return pattern_set
+
+
+PATTERN_SET = compile_pattern_set()
+
+# Hyperscan's and RE2's \s leave out characters Python's \s matches in ASCII
+# text (\x1c-\x1f, and \v for RE2); they become spaces for the prefilter,
+# which can only add matches
+PREFILTER_SPACES = bytes.maketrans(b"\x0b\x1c\x1d\x1e\x1f", b"     ")
+
+
+def on_pattern_match(pattern_id: int, start: int, end: int, flags: int, found: set):
+    """Hyperscan match callback: record which pattern matched"""
+    found.add(pattern_id)
+
+
 def is_sensitive_file(file_path: str) -> bool:
     """Check if file path matches sensitive file patterns."""
-    for pattern_str in SENSITIVE_FILE_PATTERNS:
-        if re.search(pattern_str, file_path, re.IGNORECASE):
-            return True
-    return False
+    return bool(SENSITIVE_FILE_RE.search(file_path))
+
+
+# The non-ASCII letters that IGNORECASE matches to an ASCII letter, replaced
+# by it before the anchors are looked up (str.lower() leaves them alone or,
+# for dotted capital I, turns it into two characters)
+ANCHOR_CASE_FOLDS = (
+    ("\u0130", "i"),  # LATIN CAPITAL LETTER I WITH DOT ABOVE
+    ("\u0131", "i"),  # LATIN SMALL LETTER DOTLESS I
+    ("\u017f", "s"),  # LATIN SMALL LETTER LONG S
+    ("\u212a", "k"),  # KELVIN SIGN
+)
+
+
+def patterns_to_run(content: str) -> List[Dict]:
+    """SECRET_PATTERNS that can match somewhere in content, in SECRET_PATTERNS order.
+
+    ASCII content is checked against all patterns in one pass with Hyperscan
+    (or else an RE2 set) when installed. Otherwise a pattern is kept when one
+    of its anchors occurs in the lowercased content. A pattern that matches
+    within a line also matches the whole content, so no line match is missed.
+    """
+    if content.isascii() and (PATTERN_DATABASE is not None or PATTERN_SET is not None):
+        data = content.encode().translate(PREFILTER_SPACES)
+        if PATTERN_DATABASE is not None:
+            found = set()
+            PATTERN_DATABASE.scan(data, match_event_handler=on_pattern_match, context=found)
+        else:
+            found = PATTERN_SET.Match(data) or ()
+        return [SECRET_PATTERNS[pattern_id] for pattern_id in sorted(found)]
+    if not content.isascii():
+        for letter, ascii_letter in ANCHOR_CASE_FOLDS:
+            content = content.replace(letter, ascii_letter)
+    lowered = content.lower()
+    return [
+        pattern_def for pattern_def in SECRET_PATTERNS
+        if any(anchor in lowered for anchor in pattern_def["anchors"])
+    ]
 
 
 def scan_content_for_secrets(content: str, file_path: str) -> List[Dict]:
     """Scan file content for secret patterns."""
     findings = []
+    patterns = patterns_to_run(content)
+    if not patterns:
+        return findings
+
     lines = content.split('\n')
 
     for line_num, line in enumerate(lines, start=1):
-        for pattern_def in SECRET_PATTERNS:
+        for pattern_def in patterns:
             matches = pattern_def["pattern"].finditer(line)
             for match in matches:
                 matched_value = match.group(0)
@@ -199,14 +326,35 @@ def scan_content_for_secrets(content: str, file_path: str) -> List[Dict]:
     return findings
 
 
+# Blobs larger than this are not scanned (the same limit as scan_files.py)
+MAX_BLOB_SIZE = 10 * 1024 * 1024
+
+
+# Secrets found in each blob scanned by this process, by blob SHA: the same
+# content (a revert, a cherry-pick on another branch) is only scanned once
+blob_secrets: Dict[bytes, List[Dict]] = {}
+
+
 def scan_commit(repo: git.Repo, commit: git.Commit, file_path: str) -> Optional[Dict]:
     """Scan a specific file in a commit for secrets."""
     try:
-        # Get file content at this commit
-        file_content = (commit.tree / file_path).data_stream.read().decode('utf-8', errors='ignore')
-
-        # Scan for secrets
-        secrets = scan_content_for_secrets(file_content, file_path)
+        blob = commit.tree / file_path
+        secrets = blob_secrets.get(blob.binsha)
+        if secrets is None:
+            # Skip blobs larger than MAX_BLOB_SIZE (likely binary or generated)
+            # without reading them, and binary blobs (NUL in the first 8192
+            # bytes, as git diff checks)
+            secrets = []
+            stream = blob.data_stream
+            if stream.size <= MAX_BLOB_SIZE:
+                head = stream.read(8192)
+                if b'\0' not in head:
+                    # Get file content at this commit
+                    file_content = (head + stream.read()).decode('utf-8', errors='ignore')
+
+                    # Scan for secrets
+                    secrets = scan_content_for_secrets(file_content, file_path)
+            blob_secrets[blob.binsha] = secrets
 
         if secrets:
             return {
@@ -226,32 +374,76 @@ def scan_commit(repo: git.Repo, commit: git.Commit, file_path: str) -> Optional[
     return None
 
 
+# Repository opened by each worker process (see init_worker)
+worker_repo = None
+
+
+def init_worker(repo_path: Path):
+    """Pool initializer: open the repository in the worker.
+
+    A git.Repo talks to long-running git processes over pipes, so it cannot
+    be shared with (or pickled to) other processes; each worker opens its own.
+    """
+    global worker_repo
+    worker_repo = git.Repo(repo_path)
+
+
+def scan_commit_job(job: Tuple[str, str]) -> Optional[Dict]:
+    """Scan (file path, commit SHA) in the worker's repository."""
+    file_path, commit_sha = job
+    return scan_commit(worker_repo, worker_repo.commit(commit_sha), file_path)
+
+
+def file_commits(repo: git.Repo, file_path: str) -> List[str]:
+    """SHAs of all commits (on any branch) that modified a file."""
+    try:
+        return [commit.hexsha for commit in repo.iter_commits('--all', paths=file_path)]
+    except Exception as e:
+        print(f"⚠️  Warning: Error scanning {file_path}: {e}", file=sys.stderr)
+        return []
+
+
+def file_commits_job(file_path: str) -> List[str]:
+    """file_commits in the worker's repository."""
+    return file_commits(worker_repo, file_path)
+
+
 def get_sensitive_files_from_history(repo: git.Repo) -> List[str]:
     """Get list of all sensitive files ever committed."""
     sensitive_files = set()
 
     try:
-        # Get all files from all commits
-        for commit in repo.iter_commits('--all'):
-            for item in commit.tree.traverse():
-                if item.type == 'blob':  # It's a file
-                    if is_sensitive_file(item.path):
-                        sensitive_files.add(item.path)
+        # Every path added, changed or deleted by any commit, in one git call:
+        # root commits list all their files, and -m includes merge resolutions.
+        # -z keeps unusual path names unquoted.
+        paths = repo.git.log('--all', '-m', '--root', '--no-renames', '--name-only', '-z', '--pretty=format:')
+        for path in set(paths.split('\0')):
+            if path and is_sensitive_file(path):
+                sensitive_files.add(path)
 
     except Exception as e:
         print(f"⚠️  Warning: Error traversing commits: {e}", file=sys.stderr)
 
-    return list(sensitive_files)
+    return sorted(sensitive_files)
+
 
+def scan_git_history(repo_path: Path, use_multiprocessing: bool = True) -> Iterator[Dict]:
+    """Scan git history for secrets in sensitive files, yielding findings as they are found.
 
-def scan_git_history(repo_path: Path) -> List[Dict]:
-    """Scan git history for secrets in sensitive files."""
+    The repository is opened right away, so an invalid one is reported
+    before the caller starts consuming (and writing) findings.
+    """
     try:
         repo = git.Repo(repo_path)
     except git.InvalidGitRepositoryError:
         print(f"❌ Error: {repo_path} is not a git repository", file=sys.stderr)
         sys.exit(1)
 
+    return scan_repo_history(repo, repo_path, use_multiprocessing)
+
+
+def scan_repo_history(repo: git.Repo, repo_path: Path, use_multiprocessing: bool) -> Iterator[Dict]:
+    """Findings of scan_git_history in an opened repository."""
     print(f"🔍 Scanning git history for secrets...", file=sys.stderr)
 
     # Find all sensitive files ever committed
@@ -260,7 +452,7 @@ def scan_git_history(repo_path: Path) -> List[Dict]:
 
     if not sensitive_files:
         print(f"✅ No sensitive files found in git history", file=sys.stderr)
-        return []
+        return
 
     print(f"📄 Found {len(sensitive_files)} sensitive files in history:", file=sys.stderr)
     for f in sensitive_files[:10]:  # Show first 10
@@ -268,38 +460,48 @@ def scan_git_history(repo_path: Path) -> List[Dict]:
     if len(sensitive_files) > 10:
         print(f"   ... and {len(sensitive_files) - 10} more", file=sys.stderr)
 
-    # Scan each sensitive file across all commits
-    all_findings = []
-    scanned_commits = 0
-
-    for file_path in sensitive_files:
-        print(f"🔎 Scanning history of {file_path}...", file=sys.stderr)
-
-        # Get all commits that modified this file
-        try:
-            commits = list(repo.iter_commits('--all', paths=file_path))
-
-            for commit in commits:
-                scanned_commits += 1
-                finding = scan_commit(repo, commit, file_path)
-                if finding:
-                    all_findings.append(finding)
-
-        except Exception as e:
-            print(f"⚠️  Warning: Error scanning {file_path}: {e}", file=sys.stderr)
-
-    print(f"📊 Scanned {scanned_commits} commits", file=sys.stderr)
-
-    return all_findings
-
-
-def generate_summary(findings: List[Dict]) -> Dict:
-    """Generate summary statistics."""
+    # Fork where available: workers inherit the compiled patterns
+    mp_context = get_context('fork' if 'fork' in get_all_start_methods() else None)
+    num_processes = max(1, cpu_count() - 1)
+    with (mp_context.Pool(num_processes, initializer=init_worker, initargs=(repo_path,))
+          if use_multiprocessing else nullcontext()) as pool:
+        # Collect (file, commit) pairs: each sensitive file at every commit
+        # that modified it. Each file's history is a separate walk of the
+        # commit graph, so the walks run in the pool too.
+        if pool is not None:
+            histories = pool.imap(file_commits_job, sensitive_files)
+        else:
+            histories = (file_commits(repo, file_path) for file_path in sensitive_files)
+        jobs = []
+        for file_path, commit_shas in zip(sensitive_files, histories):
+            print(f"🔎 Scanning history of {file_path}...", file=sys.stderr)
+            jobs.extend((file_path, commit_sha) for commit_sha in commit_shas)
+
+        # Scan the pairs; each reads one blob and runs the regexes over it.
+        # Results are consumed as they arrive, so findings are not held here.
+        if pool is not None and len(jobs) > 10:
+            chunksize = max(1, len(jobs) // (num_processes * 8))
+            results = pool.imap(scan_commit_job, jobs, chunksize)
+        else:
+            results = (scan_commit(repo, repo.commit(commit_sha), file_path) for file_path, commit_sha in jobs)
+        for finding in results:
+            if finding:
+                yield finding
+
+    print(f"📊 Scanned {len(jobs)} commits", file=sys.stderr)
+
+
+def generate_summary(findings: Iterable[Dict]) -> Dict:
+    """Generate summary statistics (in one pass, so findings can be a generator)."""
     severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
     files_with_secrets = set()
     commits_with_secrets = set()
+    total_findings = 0
+    total_secrets = 0
 
     for finding in findings:
+        total_findings += 1
+        total_secrets += len(finding["secrets"])
         files_with_secrets.add(finding["file"])
         commits_with_secrets.add(finding["commit_hash_full"])
 
@@ -308,14 +510,56 @@ def generate_summary(findings: List[Dict]) -> Dict:
             severity_counts[severity] = severity_counts.get(severity, 0) + 1
 
     return {
-        "total_findings": len(findings),
-        "total_secrets": sum(len(f["secrets"]) for f in findings),
+        "total_findings": total_findings,
+        "total_secrets": total_secrets,
         "files_affected": len(files_with_secrets),
         "commits_affected": len(commits_with_secrets),
         "severity_counts": severity_counts,
     }
 
 
+def encode_finding(finding: Dict) -> bytes:
+    """One finding as compact JSON, serialized by orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(finding)
+        except TypeError:
+            # Values orjson rejects (such as lone surrogates): use json
+            pass
+    return json.dumps(finding).encode()
+
+
+def write_results(output_file: Path, repo_path: Path, findings: Iterable[Dict]) -> Dict:
+    """Write findings to output_file as they are found; returns the summary.
+
+    Each finding is written on its own line as soon as the scan yields it,
+    so the history's findings are never all held in memory. The summary is
+    only known at the end, so it follows the findings in the document.
+    """
+    envelope = json.dumps({"repository": str(repo_path), "scan_type": "git_history"}, indent=2)
+    with open(output_file, 'wb') as f:
+        # The envelope without its closing "\n}", then the findings array
+        f.write(envelope[:-2].encode())
+        f.write(b',\n  "findings": [')
+
+        def written(findings: Iterable[Dict]) -> Iterator[Dict]:
+            """findings, each written to the file as it passes through"""
+            separator = b'\n    '
+            for finding in findings:
+                f.write(separator)
+                f.write(encode_finding(finding))
+                separator = b',\n    '
+                yield finding
+
+        summary = generate_summary(written(findings))
+        f.write(b'\n  ]' if summary["total_findings"] else b']')
+        # The summary, indented as a member of the top-level object
+        f.write(b',\n  "summary": ')
+        f.write(json.dumps(summary, indent=2).replace('\n', '\n  ').encode())
+        f.write(b'\n}\n')
+    return summary
+
+
 def main():
     """Main function."""
     # Determine repository directory
@@ -327,24 +571,9 @@ def main():
 
     print(f"🔍 Scanning git history in {repo_path}...", file=sys.stderr)
 
-    # Scan git history
-    findings = scan_git_history(repo_path)
-
-    # Generate summary
-    summary = generate_summary(findings)
-
-    # Output results
-    output = {
-        "repository": str(repo_path),
-        "scan_type": "git_history",
-        "summary": summary,
-        "findings": findings,
-    }
-
-    # Write to file
+    # Scan git history, writing findings and then their summary to the file
     output_file = repo_path / "git-history-scan-results.json"
-    with open(output_file, 'w') as f:
-        json.dump(output, f, indent=2)
+    summary = write_results(output_file, repo_path, scan_git_history(repo_path))
 
     # Print summary
     print(f"\n✅ Git history scan complete!", file=sys.stderr)